@@ -0,0 +1,62 @@
+"""
+Micro-benchmark of the date normalisation applied to every user_productions row.
+
+Compares the per-row strptime/strftime of the original format_date against the
+memoized DateParser on a synthetic one million row log spanning a year.
+
+Usage:
+    python benchmarks/bench_dates.py [--rows 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "src", "SBReportGenerator")
+)
+from utils.user_dates import DATE_FORMATS, DateParser, format_date  # noqa: E402
+
+
+def format_date_per_row(date_str):
+    # The original format_date: up to four strptime calls and a strftime per row
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).strftime("%d-%m-%Y")
+        except ValueError:
+            continue
+    return "Invalid date format"
+
+
+def make_dates(rows, days=365, fmt="%d-%m-%Y"):
+    start = date(2024, 1, 1)
+    per_day = max(rows // days, 1)
+    return [(start + timedelta(days=i // per_day)).strftime(fmt) for i in range(rows)]
+
+
+def timed(label, fn, values):
+    start = time.perf_counter()
+    for value in values:
+        fn(value)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34}{elapsed:8.3f} s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    for fmt in ("%d-%m-%Y", "%d/%m/%y"):
+        values = make_dates(args.rows, fmt=fmt)
+        print(f"{args.rows:,} rows dated {fmt!r}:")
+        before = timed("  per-row strptime (original)", format_date_per_row, values)
+        after = timed("  DateParser.parse", DateParser().parse, values)
+        timed("  format_date (memoized)", format_date, values)
+        print(f"  speedup {before / after:.0f}x\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Import time benchmark of the SBReportGenerator package.
+
+Imports the package in fresh interpreters with -X importtime, reports the best
+cumulative import time and the slowest modules, and fails if the import takes
+longer than the threshold or pulls in a library that should only be loaded when
+a chart or pdf is produced.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 5] [--threshold-ms 250]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+PACKAGE = "SBReportGenerator"
+# Libraries that must not be imported by `import SBReportGenerator` alone
+LAZY_MODULES = ("matplotlib", "seaborn", "pandas", "numpy", "reportlab", "PIL", "pkg_resources")
+
+CHECK_LAZY = (
+    f"import sys, {PACKAGE}\n"
+    f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+)
+
+
+def run_python(*args):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [SRC, os.path.join(SRC, PACKAGE), env.get("PYTHONPATH", "")]
+    )
+    return subprocess.run(
+        [sys.executable, *args], env=env, capture_output=True, text=True, check=True
+    )
+
+
+def parse_importtime(stderr):
+    """
+    Parses -X importtime output into {module: (self_us, cumulative_us)}.
+    """
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        timings[module.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure():
+    timings = parse_importtime(run_python("-X", "importtime", "-c", f"import {PACKAGE}").stderr)
+    return timings[PACKAGE][1] / 1000, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threshold-ms", type=float, default=250.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    best_ms, timings = min(runs, key=lambda run: run[0])
+    print(f"import {PACKAGE}: best {best_ms:.1f} ms of {args.runs} runs")
+    print("slowest modules (self time):")
+    for module, (self_us, _) in sorted(timings.items(), key=lambda item: -item[1][0])[: args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {module}")
+
+    failed = False
+    eager = run_python("-c", CHECK_LAZY).stdout.strip()
+    if eager:
+        print(f"FAIL: importing {PACKAGE} loads {eager}")
+        failed = True
+    if best_ms > args.threshold_ms:
+        print(f"FAIL: {best_ms:.1f} ms is over the {args.threshold_ms:.0f} ms threshold")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
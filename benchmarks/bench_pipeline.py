@@ -0,0 +1,233 @@
+"""
+Per stage benchmark of the report pipeline on synthetic logs.
+
+For each log size, generates (or reuses) a synthetic single user log and times
+each stage of a report separately:
+
+- parse: streaming the file through iter_user_productions
+- aggregate: DailyStatsBuilder and UserStats, beyond the parse time
+- bar_chart: rendering the accuracy bar chart PNG
+- heatmap: rendering the accuracy by word table PNG
+- pdf_assembly: create_pdf_report with the charts already rendered (taken from a render cache)
+- pdf_total: a cold create_pdf_report in --chart-format, charts included
+
+Results are written as JSON so they can be kept and compared between
+commits; with --baseline the run fails if a stage got slower than the
+tolerance allows. A result is only compared with the baseline result of the
+same log and chart format (rows, words, days, seed and chart_format); the run
+is refused if the baseline has none.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--rows 1000 100000 10000000]
+        [--output results.json] [--baseline previous.json --tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from synthetic_logs import generate_log
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path[:0] = [SRC, os.path.join(SRC, "SBReportGenerator")]
+from SBReportGenerator import user_productions_example_file  # noqa: E402
+from utils.render_cache import RenderCache  # noqa: E402
+from utils.user_stats import (  # noqa: E402
+    CHART_FORMATS,
+    DailyStatsBuilder,
+    UserStats,
+    iter_user_productions,
+)
+
+STAGES = ("parse", "aggregate", "bar_chart", "heatmap", "pdf_assembly", "pdf_total")
+# Stages faster than this are too noisy to flag as regressions
+MIN_COMPARED_SECONDS = 0.05
+# The fields a result is only comparable to a baseline result on
+RESULT_KEY = ("rows", "words", "days", "seed", "chart_format")
+
+
+class ChartsOnlyCache(RenderCache):
+    """
+    Render cache that never returns a finished report, so create_pdf_report
+    reuses the rendered charts but still assembles the pdf.
+    """
+
+    def get(self, key):
+        if key.startswith("report-"):
+            return None
+        return super().get(key)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def synthetic_log(data_dir, rows, words, days, seed):
+    """
+    Returns the path of the synthetic log with these parameters, generating it
+    the first time.
+    """
+    path = os.path.join(data_dir, f"productions-{rows}-{words}w-{days}d-{seed}.txt")
+    if not os.path.exists(path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            generate_log(file, words=words, days=days, rows=rows, seed=seed)
+        os.replace(tmp_path, path)
+    return path
+
+
+def bench_log(path, chart_format):
+    """
+    Times the stages of one report of the log at path, in seconds.
+    """
+    def parse():
+        with open(path, "r") as file:
+            for _ in iter_user_productions(file):
+                pass
+
+    def aggregate():
+        with open(path, "r") as file:
+            builder = DailyStatsBuilder().update(file)
+        user_stats = UserStats.from_builder(builder)
+        user_stats.get_bucket_stats()
+        return user_stats
+
+    stages = {}
+    stages["parse"], _ = timed(parse)
+    load, user_stats = timed(aggregate)
+    stages["aggregate"] = max(load - stages["parse"], 0.0)
+    stages["bar_chart"], _ = timed(
+        lambda: user_stats.get_percentage_of_word_accuracy_img(from_today=False)
+    )
+    stages["heatmap"], _ = timed(lambda: user_stats.create_table(from_today=False))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_pdf = os.path.join(tmp_dir, "report.pdf")
+        cache = ChartsOnlyCache(os.path.join(tmp_dir, "cache"))
+        # Untimed run filling the cache with the charts
+        user_stats.create_pdf_report(output_pdf, chart_format="png", cache=cache)
+        stages["pdf_assembly"], _ = timed(
+            lambda: user_stats.create_pdf_report(output_pdf, chart_format="png", cache=cache)
+        )
+        stages["pdf_total"], _ = timed(
+            lambda: user_stats.create_pdf_report(output_pdf, chart_format=chart_format)
+        )
+    return stages
+
+
+def result_key(result):
+    return tuple(result.get(field) for field in RESULT_KEY)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares results with the results of a baseline result file measured on
+    the same log and chart format, see RESULT_KEY.
+
+    Returns:
+    tuple: (regressions, unmatched), the regressions as (rows, stage, seconds,
+    baseline_seconds) tuples and the results without a baseline result to
+    compare with.
+    """
+    previous = {
+        # Older files only record the chart format of the whole run
+        result_key({"chart_format": baseline.get("chart_format"), **result}): result["stages"]
+        for result in baseline["results"]
+    }
+    regressions, unmatched = [], []
+    for result in results:
+        stages = previous.get(result_key(result))
+        if stages is None:
+            unmatched.append(result)
+            continue
+        for stage, seconds in result["stages"].items():
+            before = stages.get(stage)
+            if before is None or max(seconds, before) < MIN_COMPARED_SECONDS:
+                continue
+            if seconds > before * (1 + tolerance):
+                regressions.append((result["rows"], stage, seconds, before))
+    return regressions, unmatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000, 10_000_000])
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="keep the best of this many runs per stage")
+    parser.add_argument("--chart-format", choices=CHART_FORMATS, default="png")
+    parser.add_argument(
+        "--data-dir",
+        default=os.path.join(tempfile.gettempdir(), "sbreport-bench"),
+        help="where the synthetic logs are kept between runs",
+    )
+    parser.add_argument("--output", default=None, help="JSON results file, stdout by default")
+    parser.add_argument("--baseline", default=None, help="JSON results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    # Untimed run so the imports, fonts and figure templates are not billed to the first size
+    bench_log(user_productions_example_file, args.chart_format)
+    results = []
+    for rows in args.rows:
+        generate_seconds, path = timed(
+            lambda: synthetic_log(args.data_dir, rows, args.words, args.days, args.seed)
+        )
+        runs = [bench_log(path, args.chart_format) for _ in range(args.repeat)]
+        stages = {stage: min(run[stage] for run in runs) for stage in STAGES}
+        results.append(
+            {
+                "rows": rows,
+                "words": args.words,
+                "days": args.days,
+                "seed": args.seed,
+                "chart_format": args.chart_format,
+                "log_bytes": os.path.getsize(path),
+                "stages": {stage: round(seconds, 4) for stage, seconds in stages.items()},
+            }
+        )
+        print(f"{rows:>12,} rows  (log ready in {generate_seconds:.1f} s)", file=sys.stderr)
+        for stage, seconds in stages.items():
+            print(f"    {stage:<14}{seconds:10.3f} s", file=sys.stderr)
+
+    report = {
+        "benchmark": "pipeline",
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "chart_format": args.chart_format,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as file:
+            regressions, unmatched = compare(results, json.load(file), args.tolerance)
+        for result in unmatched:
+            key = ", ".join(f"{field}={result[field]}" for field in RESULT_KEY)
+            print(f"NOT COMPARED: the baseline has no result with {key}", file=sys.stderr)
+        for rows, stage, seconds, before in regressions:
+            print(
+                f"REGRESSION: {stage} at {rows:,} rows took {seconds:.3f} s, was {before:.3f} s",
+                file=sys.stderr,
+            )
+        if unmatched:
+            sys.exit(2)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
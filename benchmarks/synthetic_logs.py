@@ -0,0 +1,116 @@
+"""
+Synthetic user_productions log generator for the benchmarks.
+
+Writes logs in the app's `uid,Word,Score,DD-MM-YYYY HH:MM:SS` format with a
+configurable number of users, words, days and attempts per day. Attempts are
+spread over the app's waking hours in time order, so no two rows of a user
+share a timestamp. The output only depends on the parameters and the seed.
+
+Usage:
+    python benchmarks/synthetic_logs.py out.txt [--users 1] [--words 60]
+        [--days 365] [--attempts-per-day 20 | --rows 100000] [--seed 0]
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+# 07:00 to 21:00, the hours a child could be using the app
+FIRST_SECOND = 7 * 3600
+LAST_SECOND = 21 * 3600
+MAX_ATTEMPTS_PER_DAY = LAST_SECOND - FIRST_SECOND
+GRADES = ("1", "0", "2")
+GRADE_WEIGHTS = (0.6, 0.3, 0.1)
+START_DATE = date(2024, 1, 1)
+
+TIMES = [
+    f"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}"
+    for second in range(24 * 3600)
+]
+
+
+def attempts_per_user_day(users, days, attempts_per_day=20, rows=None):
+    """
+    Returns the number of attempts of each (day, user), day major. With rows the
+    attempts are spread as evenly as possible so the log has exactly rows rows.
+    """
+    cells = users * days
+    if rows is None:
+        counts = [attempts_per_day] * cells
+    else:
+        counts = [rows * (i + 1) // cells - rows * i // cells for i in range(cells)]
+    if max(counts, default=0) > MAX_ATTEMPTS_PER_DAY:
+        raise ValueError(
+            f"At most {MAX_ATTEMPTS_PER_DAY} attempts per user and day fit without repeating "
+            f"a timestamp, use more days or users"
+        )
+    return counts
+
+
+def generate_log(
+    file,
+    users=1,
+    words=60,
+    days=365,
+    attempts_per_day=20,
+    rows=None,
+    start=START_DATE,
+    seed=0,
+):
+    """
+    Writes a synthetic log to the open text file and returns its number of rows.
+
+    Parameters:
+    file: Open text file to write to.
+    users (int): Number of users, named kid0@example.com, kid1@example.com, ...
+    words (int): Size of the vocabulary, Word0 to Word<words - 1>.
+    days (int): Number of consecutive days, from start.
+    attempts_per_day (int): Attempts per user and day, ignored when rows is given.
+    rows (int): (Optional) Exact number of rows, spread evenly over the users and days.
+    start (datetime.date): First day of the log.
+    seed (int): Random seed.
+    """
+    rng = random.Random(seed)
+    uids = [f"kid{user}@example.com" for user in range(users)]
+    vocabulary = [f"Word{word}" for word in range(words)]
+    counts = iter(attempts_per_user_day(users, days, attempts_per_day, rows))
+    written = 0
+    for day in range(days):
+        date_str = (start + timedelta(days=day)).strftime("%d-%m-%Y")
+        for uid in uids:
+            count = next(counts)
+            seconds = sorted(rng.sample(range(FIRST_SECOND, LAST_SECOND), count))
+            picked = rng.choices(vocabulary, k=count)
+            grades = rng.choices(GRADES, weights=GRADE_WEIGHTS, k=count)
+            file.writelines(
+                f"{uid},{word},{grade},{date_str} {TIMES[second]}\n"
+                for word, grade, second in zip(picked, grades, seconds)
+            )
+            written += count
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("output")
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--attempts-per-day", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=None, help="exact number of rows, overrides --attempts-per-day")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    with open(args.output, "w") as file:
+        rows = generate_log(
+            file,
+            users=args.users,
+            words=args.words,
+            days=args.days,
+            attempts_per_day=args.attempts_per_day,
+            rows=args.rows,
+            seed=args.seed,
+        )
+    print(f"wrote {rows:,} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
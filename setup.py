@@ -18,4 +18,7 @@ setup(
     package_data={
         "SBReportGenerator": ["images/*.png", "data/user_productions_example.txt"],
     },
+    entry_points={
+        "console_scripts": ["sbreport=SBReportGenerator.cli:main"],
+    },
 )
@@ -1,9 +1,30 @@
 from importlib.resources import files
-from .report_core import generate_user_report
+from .report_core import generate_caseload_report, generate_user_report, generate_user_reports
+from utils.instrumentation import CallbackSink, JsonLinesSink, LoggingSink, instrument
 
 
 user_productions_example_file = str(
     files("SBReportGenerator").joinpath("data", "user_productions_example.txt")
 )
 
-__all__ = ["generate_user_report", "user_productions_example_file"]
+__all__ = [
+    "generate_user_report",
+    "generate_user_reports",
+    "generate_caseload_report",
+    "user_productions_example_file",
+    "instrument",
+    "LoggingSink",
+    "JsonLinesSink",
+    "CallbackSink",
+    "generate_user_report_async",
+    "AsyncReportGenerator",
+]
+
+
+def __getattr__(name):
+    # The asyncio API is only imported when used, to keep `import SBReportGenerator` fast
+    if name in ("generate_user_report_async", "AsyncReportGenerator"):
+        from . import async_reports
+
+        return getattr(async_reports, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,120 @@
+"""
+asyncio API for report generation.
+
+The charts and the pdf are rendered in an executor, by default a pool of
+worker processes, so the event loop is never blocked by a render. Concurrent
+requests wait on a semaphore rather than piling up in the executor, and a
+cancelled request never writes its output file.
+
+    async with AsyncReportGenerator(max_workers=4) as reports:
+        await reports.generate_user_report("user_productions.txt", "report.pdf")
+
+or, with a process wide default pool:
+
+    await generate_user_report_async("user_productions.txt", "report.pdf")
+"""
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+from .report_core import _init_report_worker, generate_user_report
+
+# pyplot and the shared figure templates are not thread safe: renders in a
+# thread executor take turns, in a process pool each worker has its own lock
+_RENDER_LOCK = threading.Lock()
+
+_default_generator = None
+
+
+def _render_report_bytes(user_productions, options):
+    """
+    Renders a report with generate_user_report and returns its bytes, None
+    when user_productions is empty.
+    """
+    with _RENDER_LOCK:
+        return generate_user_report(user_productions, **options)
+
+
+def _write_file(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+class AsyncReportGenerator:
+    """
+    Generates reports from coroutines without blocking the event loop.
+
+    :param executor: (Optional) Thread or process executor the reports are rendered in. By default a
+        process pool of max_workers warmed workers is created, and shut down by aclose.
+    :param max_workers: Number of worker processes of the default pool, None for one per CPU.
+    :param max_concurrency: Maximum number of reports rendered at once, the others wait their
+        turn without occupying the executor. Defaults to max_workers.
+    """
+
+    def __init__(self, executor=None, max_workers=None, max_concurrency=None):
+        max_workers = max_workers or os.cpu_count() or 1
+        self._owns_executor = executor is None
+        if executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers, initializer=_init_report_worker
+            )
+        self.executor = executor
+        self.max_concurrency = max_concurrency or max_workers
+        # A semaphore belongs to one event loop, the generator may outlive several
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self, loop):
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def generate_user_report(self, user_productions, output_pdf, **options):
+        """
+        Async generate_user_report: takes the same arguments, and returns
+        output_pdf, or None when user_productions is empty and no report was written.
+
+        Cancelling the call while it waits for its turn removes it from the queue;
+        cancelling it while it renders discards the result, and output_pdf is not written.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._semaphore(loop):
+            pdf = await loop.run_in_executor(
+                self.executor, _render_report_bytes, user_productions, options
+            )
+        if pdf is None:
+            return None
+        # File writes go to the loop's default thread pool, off the event loop
+        await loop.run_in_executor(None, _write_file, output_pdf, pdf)
+        return output_pdf
+
+    async def aclose(self):
+        """
+        Shuts down the executor if it was created here, waiting for the renders in progress.
+        """
+        if self._owns_executor:
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self.executor.shutdown(wait=True, cancel_futures=True)
+            )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.aclose()
+
+
+async def generate_user_report_async(user_productions, output_pdf, **options):
+    """
+    Async generate_user_report, rendering in a process wide AsyncReportGenerator
+    with one worker per CPU. Create an AsyncReportGenerator to choose the executor
+    or the concurrency limit.
+    """
+    global _default_generator
+    if _default_generator is None:
+        _default_generator = AsyncReportGenerator()
+    return await _default_generator.generate_user_report(user_productions, output_pdf, **options)
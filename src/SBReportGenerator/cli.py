@@ -0,0 +1,238 @@
+"""
+sbreport command line interface.
+
+    sbreport logs/*.txt -o reports --jobs 4
+    cat user_productions.txt | sbreport - -o reports
+
+Inputs are files, glob patterns (expanded here too, for when they reach us
+quoted, e.g. from cron) or - for stdin. By default the inputs are read as one
+combined log and a report is written per user; with --per file each input is
+one user's log and its report is named after the file. --caseload writes all
+the users into one pdf instead, with a table of contents:
+
+    sbreport logs/*.txt --caseload caseload.pdf
+"""
+import argparse
+import contextlib
+import glob
+import os
+import sys
+import time
+
+from .report_core import (
+    STATS_BACKENDS,
+    _generate_report_job,
+    _get_render_cache,
+    _init_report_worker,
+    generate_caseload_report,
+    generate_user_reports,
+)
+from utils.instrumentation import JsonLinesSink, instrument
+from utils.user_dates import BUCKETS
+from utils.user_stats import CHART_FORMATS, DailyStatsBuilder
+
+STDIN = "-"
+
+
+def expand_inputs(patterns):
+    """
+    Expands the input arguments into a list of paths, keeping their order and
+    dropping duplicates. Raises ValueError for a pattern that matches nothing.
+    """
+    paths = []
+    for pattern in patterns:
+        if pattern == STDIN:
+            matches = [STDIN]
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern] if os.path.exists(pattern) else []
+        if not matches:
+            raise ValueError(f"No input matches {pattern!r}")
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+
+def _read_lines(path):
+    if path == STDIN:
+        return sys.stdin.readlines()
+    with open(path, "r") as file:
+        return file.readlines()
+
+
+def file_report_name(path, taken):
+    """
+    Report file name of an input with --per file: the input's name with a .pdf
+    extension, numbered when two inputs share a name.
+    """
+    stem = "stdin" if path == STDIN else os.path.splitext(os.path.basename(path))[0]
+    name, number = f"{stem}.pdf", 1
+    while name in taken:
+        number += 1
+        name = f"{stem}-{number}.pdf"
+    taken.add(name)
+    return name
+
+
+def _file_report_job(path, lines, output_pdf, stats_backend="dict", **options):
+    """
+    Renders the report of one input file. lines are the already read lines of
+    stdin, None to read the file in the worker.
+    """
+    try:
+        if lines is None:
+            lines = _read_lines(path)
+        if not any(line.strip() for line in lines):
+            raise ValueError("Empty user_productions")
+        source = lines
+        if stats_backend == "dict":
+            source = DailyStatsBuilder().update(lines)
+    except (OSError, ValueError) as e:
+        error = f"{type(e).__name__}: {e}"
+        print(f"...failed {path}: {error}")
+        return {"uid": path, "output_pdf": output_pdf, "rows": 0, "ok": False, "error": error}
+    return _generate_report_job(path, source, output_pdf, stats_backend=stats_backend, **options)
+
+
+def generate_file_reports(paths, output_dir, jobs=1, **options):
+    """
+    Generates one report per input file, in up to jobs worker processes.
+    Returns the per report summaries of generate_user_reports.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    taken = set()
+    report_jobs = [
+        (
+            path,
+            _read_lines(STDIN) if path == STDIN else None,
+            os.path.join(output_dir, file_report_name(path, taken)),
+        )
+        for path in paths
+    ]
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1 or len(report_jobs) <= 1:
+        return [_file_report_job(*job, **options) for job in report_jobs]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(report_jobs)), initializer=_init_report_worker
+    ) as executor:
+        futures = [executor.submit(_file_report_job, *job, **options) for job in report_jobs]
+        return [future.result() for future in futures]
+
+
+def _open_inputs(paths):
+    """
+    Yields the lines of all the inputs in turn, as one combined log.
+    """
+    for path in paths:
+        if path == STDIN:
+            yield from sys.stdin
+        else:
+            with open(path, "r") as file:
+                yield from file
+
+
+def print_summary(results, seconds, file=None):
+    ok = sum(result["ok"] for result in results)
+    rows = sum(result["rows"] for result in results)
+    print(
+        f"{ok} of {len(results)} reports generated from {rows} rows in {seconds:.2f}s"
+        f" ({len(results) / seconds:.1f} reports/s, {rows / seconds:.0f} rows/s)",
+        file=file,
+    )
+    for result in results:
+        if not result["ok"]:
+            print(f"  failed {result['uid']}: {result['error']}", file=file)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="sbreport", description="Generate SayBanana user reports from user_productions logs."
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        default=[STDIN],
+        help="log files or glob patterns, - for stdin (the default)",
+    )
+    parser.add_argument("-o", "--output-dir", default=".", help="directory the reports are written to")
+    parser.add_argument(
+        "--per",
+        choices=("user", "file"),
+        default="user",
+        help="one report per user of the combined inputs, or one per input file",
+    )
+    parser.add_argument(
+        "--caseload",
+        default=None,
+        metavar="FILE",
+        help="write the reports of all users into the single pdf FILE, with a table of contents, instead of one file each",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="worker processes, 0 for one per CPU"
+    )
+    parser.add_argument("--chart-format", choices=CHART_FORMATS, default="png")
+    parser.add_argument("--stats-backend", choices=STATS_BACKENDS, default="dict")
+    parser.add_argument("--cache", default=None, help="render cache directory")
+    parser.add_argument("--window", type=int, default=14, help="number of buckets in the charts")
+    parser.add_argument("--bucket", choices=BUCKETS, default="day")
+    parser.add_argument(
+        "--trace",
+        default=None,
+        metavar="FILE",
+        help="append the timing spans of each stage to FILE as JSON lines (reports rendered in this process only, i.e. --jobs 1)",
+    )
+    parser.add_argument("--profile", default=None, metavar="FILE", help="run under cProfile and dump the stats to FILE")
+    parser.add_argument("--trace-memory", action="store_true", help="add tracemalloc memory figures to the --trace spans")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or more")
+    if args.window < 1:
+        parser.error("--window must be 1 or more")
+    if args.caseload is not None and args.per == "file":
+        parser.error("--caseload combines the users of the inputs, it cannot be used with --per file")
+    try:
+        paths = expand_inputs(args.inputs)
+    except ValueError as e:
+        parser.error(str(e))
+    options = {
+        "jobs": args.jobs or None,
+        "chart_format": args.chart_format,
+        "stats_backend": args.stats_backend,
+        "cache": _get_render_cache(args.cache),
+        "window": args.window,
+        "bucket": args.bucket,
+    }
+
+    with contextlib.ExitStack() as stack:
+        if args.trace is not None or args.profile is not None:
+            sinks = []
+            if args.trace is not None:
+                sinks.append(JsonLinesSink(args.trace))
+                stack.callback(sinks[-1].close)
+            stack.enter_context(
+                instrument(*sinks, profile=args.profile, trace_memory=args.trace_memory)
+            )
+        start = time.perf_counter()
+        if args.caseload is not None:
+            # One document is drawn page after page, so it takes no --jobs
+            options.pop("jobs")
+            results = generate_caseload_report(_open_inputs(paths), args.caseload, **options)
+        elif args.per == "file":
+            results = generate_file_reports(paths, args.output_dir, **options)
+        else:
+            results = generate_user_reports(_open_inputs(paths), args.output_dir, **options)
+    print_summary(results, time.perf_counter() - start)
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
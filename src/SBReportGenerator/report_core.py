@@ -1,30 +1,358 @@
-from utils.user_stats import UserStats
+import os
+import re
+from utils.user_stats import (
+    UserStats,
+    DailyStatsBuilder,
+    aggregate_by_uid,
+    check_report_options,
+    split_by_uid,
+)
+from utils.checkpoint import aggregate_incrementally
+from utils.instrumentation import span
+from utils.render_cache import RenderCache
 
-def generate_user_report(user_productions, output_pdf):
+STATS_BACKENDS = ("dict", "columnar")
+
+
+def _get_stats_backend(stats_backend):
+    if stats_backend not in STATS_BACKENDS:
+        raise ValueError(
+            f"stats_backend must be one of {list(STATS_BACKENDS)}, got {stats_backend!r}"
+        )
+    if stats_backend == "columnar":
+        # numpy and pandas are only imported when the columnar backend is used
+        from utils.columnar_stats import ColumnarUserStats
+
+        return ColumnarUserStats
+    return UserStats
+
+
+def _get_render_cache(cache):
+    if cache is None or isinstance(cache, RenderCache):
+        return cache
+    return RenderCache(cache)
+
+
+def generate_user_report(
+    user_productions,
+    output_pdf=None,
+    chart_format="png",
+    stats_backend="dict",
+    checkpoint=None,
+    cache=None,
+    window=14,
+    bucket="day",
+    columnar_cache=None,
+):
     """
     Generates a pdf user report from the user_productions.txt file generated by the SayBanana app.
 
     Parameters:
     - user_productions (str | list): Path to a .txt file with daily user stats, or directly the list of stats.
-    - output_pdf (str): File path where the generated PDF report will be saved.
+      Files are streamed, so memory does not grow with the length of the log.
+    - output_pdf (str | file): File path where the generated PDF report will be saved, or a writable
+      binary stream it is written to. None returns the PDF as bytes without touching the filesystem.
+    - chart_format (str): "png" to embed the charts as bitmaps or "vector" to draw them as vector graphics.
+    - stats_backend (str): "dict" for the row by row UserStats aggregation, or "columnar" for the
+      vectorised pandas one, which is much faster on long logs.
+    - checkpoint (str): (Optional) Path of an aggregate checkpoint for the file. The statistics are
+      saved there, and later runs only parse the lines appended since. Requires a file path and
+      the "dict" backend.
+    - cache (str | RenderCache): (Optional) Render cache, or the directory of one, reusing the
+      charts and the whole report when their inputs did not change since a previous run.
+    - window (int): Number of buckets shown in the charts, counted back from the most recent activity.
+    - bucket (str): "day", "week" or "month", the period each bar and word table column sums up,
+      e.g. window=6, bucket="month" for a six month review.
+    - columnar_cache (str): (Optional) Directory where the parsed log is kept as binary columns,
+      so later runs on the unchanged file skip parsing the text. Rebuilt automatically when the
+      file changes. Requires a file path and the "columnar" backend.
+
+    Returns:
+    - bytes | None: The PDF when output_pdf is None, otherwise None. None as well for an empty log.
     """
-    def _load_user_productions_content(user_productions):
+    def _load_user_stats(user_productions, stats_class):
+        if checkpoint is not None:
+            if not isinstance(user_productions, str) or stats_backend != "dict":
+                raise ValueError(
+                    "checkpoint requires user_productions to be a file path and the 'dict' stats_backend."
+                )
+            with span("load", checkpoint=True):
+                builder, resumed = aggregate_incrementally(user_productions, checkpoint)
+            with span("user_stats", resumed=resumed):
+                return UserStats.from_builder(builder) if builder.rows else None
+        if columnar_cache is not None:
+            if not isinstance(user_productions, str) or stats_backend != "columnar":
+                raise ValueError(
+                    "columnar_cache requires user_productions to be a file path and the 'columnar' stats_backend."
+                )
         if isinstance(user_productions, str):
-            content = []
-            with open(user_productions, "r") as file:
-                content = [line.rstrip() for line in file]
+            if stats_backend == "columnar":
+                # Let pandas parse the file directly rather than going through a list of lines
+                if not os.path.getsize(user_productions):
+                    return None
+                with span("user_stats", stats_backend=stats_backend):
+                    return stats_class.from_file(user_productions, columnar_cache=columnar_cache)
+            with span("load"), open(user_productions, "r") as file:
+                builder = DailyStatsBuilder().update(file)
+            with span("user_stats", stats_backend=stats_backend):
+                return UserStats.from_builder(builder) if builder.rows else None
         elif isinstance(user_productions, list):
-            content = user_productions
+            with span("user_stats", stats_backend=stats_backend):
+                return stats_class(user_productions) if user_productions else None
         else:
             raise ValueError(
                 "user_productions must be either a string (file path) or a list of strings."
             )
-        return content
 
-    content = _load_user_productions_content(user_productions)
-    if content:
-        user_stats = UserStats(content)
-        user_stats.create_pdf_report(output_pdf)
-        print(f"...generating {output_pdf}")
+    with span("report", output_pdf=output_pdf):
+        user_stats = _load_user_stats(user_productions, _get_stats_backend(stats_backend))
+        if user_stats is None:
+            print("Empty user_productions.txt")
+            return None
+        with span("create_pdf_report", chart_format=chart_format):
+            report = user_stats.create_pdf_report(
+                output_pdf,
+                chart_format=chart_format,
+                cache=_get_render_cache(cache),
+                window=window,
+                bucket=bucket,
+            )
+        if isinstance(output_pdf, str):
+            print(f"...generating {output_pdf}")
+        return report if output_pdf is None else None
+
+
+def user_report_filename(uid):
+    """
+    Builds a filesystem safe pdf file name for a user's report from their uid.
+    """
+    return re.sub(r"[^A-Za-z0-9@._-]", "_", uid) + ".pdf"
+
+
+def _init_report_worker():
+    """
+    Warms a batch worker process once: selects the non-interactive Agg backend
+    and imports the plotting and pdf libraries before the first report job.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+    import seaborn  # noqa: F401
+    from reportlab.pdfgen import canvas  # noqa: F401
+
+
+def _source_rows(source):
+    if isinstance(source, DailyStatsBuilder):
+        return source.rows
+    return len(source)
+
+
+def _source_user_stats(source, stats_backend="dict"):
+    with span("user_stats", stats_backend=stats_backend):
+        if isinstance(source, DailyStatsBuilder):
+            if source.error is not None:
+                raise ValueError(source.error)
+            return UserStats.from_builder(source)
+        return _get_stats_backend(stats_backend)(source)
+
+
+def _partition_users(user_productions, stats_backend="dict"):
+    """
+    Reads a combined log and returns its users' sources by uid, see _generate_report_job.
+    """
+    # The dict backend aggregates while streaming; the columnar one needs each user's rows
+    partition = aggregate_by_uid
+    if _get_stats_backend(stats_backend) is not UserStats:
+        partition = split_by_uid
+    if isinstance(user_productions, str):
+        with span("load", users=True), open(user_productions, "r") as file:
+            return partition(file)
+    elif hasattr(user_productions, "__iter__"):
+        with span("load", users=True):
+            return partition(user_productions)
     else:
-        print("Empty user_productions.txt")
+        raise ValueError(
+            "user_productions must be either a string (file path) or an iterable of strings."
+        )
+
+
+def _generate_report_job(
+    uid,
+    source,
+    output_pdf,
+    chart_format="png",
+    stats_backend="dict",
+    cache=None,
+    window=14,
+    bucket="day",
+):
+    """
+    Renders one user's report of a batch. source is either the user's
+    aggregated DailyStatsBuilder or, for the columnar backend, their log lines.
+    """
+    result = {"uid": uid, "output_pdf": output_pdf, "rows": _source_rows(source)}
+    cache = _get_render_cache(cache)
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    try:
+        with span("report", uid=uid, output_pdf=output_pdf):
+            user_stats = _source_user_stats(source, stats_backend)
+            with span("create_pdf_report", chart_format=chart_format):
+                user_stats.create_pdf_report(
+                    output_pdf, chart_format=chart_format, cache=cache, window=window, bucket=bucket
+                )
+        result.update(ok=True, error=None)
+        print(f"...generating {output_pdf}")
+    except Exception as e:
+        result.update(ok=False, error=f"{type(e).__name__}: {e}")
+        print(f"...failed {uid}: {result['error']}")
+    if cache is not None:
+        result.update(cache_hits=cache.hits - hits, cache_misses=cache.misses - misses)
+    return result
+
+
+def generate_user_reports(
+    user_productions,
+    output_dir,
+    jobs=1,
+    chart_format="png",
+    stats_backend="dict",
+    cache=None,
+    window=14,
+    bucket="day",
+):
+    """
+    Generates one pdf report per user from a combined user_productions.txt file
+    holding the logs of many users. The file is streamed once and aggregated per
+    uid, and a failing user does not stop the reports of the others.
+
+    Parameters:
+    - user_productions (str | iterable): Path to a combined .txt log, or directly the log lines, e.g.
+      a list or an open file such as sys.stdin, which is streamed.
+    - output_dir (str): Directory where the per-user PDF reports will be saved.
+    - jobs (int | None): Number of worker processes rendering reports in parallel.
+      1 renders in this process, None uses one worker per CPU.
+    - chart_format (str): "png" to embed the charts as bitmaps or "vector" to draw them as vector graphics.
+    - stats_backend (str): "dict" or "columnar", see generate_user_report.
+    - cache (str | RenderCache): (Optional) Render cache, or the directory of one, shared by all users.
+    - window (int), bucket (str): The charts' reporting window, see generate_user_report.
+
+    Returns:
+    - list[dict]: One summary per user with the keys "uid", "output_pdf", "rows",
+      "ok" and "error" (None when the report was generated), plus "cache_hits" and
+      "cache_misses" when a cache is used.
+    """
+    cache = _get_render_cache(cache)
+    users = _partition_users(user_productions, stats_backend)
+
+    os.makedirs(output_dir, exist_ok=True)
+    report_jobs = [
+        (uid, source, os.path.join(output_dir, user_report_filename(uid)))
+        for uid, source in users.items()
+    ]
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1 or len(report_jobs) <= 1:
+        return [
+            _generate_report_job(
+                *job,
+                chart_format=chart_format,
+                stats_backend=stats_backend,
+                cache=cache,
+                window=window,
+                bucket=bucket,
+            )
+            for job in report_jobs
+        ]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(report_jobs)), initializer=_init_report_worker
+    ) as executor:
+        futures = [
+            executor.submit(
+                _generate_report_job,
+                *job,
+                chart_format=chart_format,
+                stats_backend=stats_backend,
+                cache=cache,
+                window=window,
+                bucket=bucket,
+            )
+            for job in report_jobs
+        ]
+        for (uid, source, output_pdf), future in zip(report_jobs, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # The worker itself died, e.g. killed for running out of memory
+                results.append(
+                    {
+                        "uid": uid,
+                        "output_pdf": output_pdf,
+                        "rows": _source_rows(source),
+                        "ok": False,
+                        "error": f"{type(e).__name__}: {e}",
+                    }
+                )
+    return results
+
+
+def generate_caseload_report(
+    user_productions,
+    output_pdf,
+    chart_format="png",
+    stats_backend="dict",
+    cache=None,
+    window=14,
+    bucket="day",
+):
+    """
+    Generates one combined pdf with the reports of all the users of a combined
+    user_productions.txt file, e.g. a therapist's whole caseload: a table of
+    contents, then one section per user in uid order, bookmarked under their uid.
+    The logo, fonts and colour scales are stored once for the whole document.
+
+    Parameters:
+    - user_productions (str | iterable): Path to a combined .txt log, or directly the log lines.
+    - output_pdf (str | file): File path where the PDF will be saved, or a writable binary stream.
+    - chart_format (str), stats_backend (str), cache (str | RenderCache), window (int), bucket (str):
+      See generate_user_reports.
+
+    Returns:
+    - list[dict]: One summary per user with the keys of generate_user_reports, plus "page",
+      the first page of their section, and "pages". A user whose report failed gets a
+      section with the error instead, and "ok" False.
+    """
+    from utils.caseload import create_caseload_pdf
+
+    # Bad options fail before the log is read
+    check_report_options(chart_format, window, bucket)
+    cache = _get_render_cache(cache)
+    users = _partition_users(user_productions, stats_backend)
+    uids = sorted(users)
+    rows = {uid: _source_rows(source) for uid, source in users.items()}
+
+    def load_user_stats(uid):
+        # Each user's aggregate is dropped once their section is drawn
+        return _source_user_stats(users.pop(uid), stats_backend)
+
+    with span("caseload", output_pdf=output_pdf, users=len(uids)):
+        results = create_caseload_pdf(
+            uids,
+            load_user_stats,
+            output_pdf,
+            chart_format=chart_format,
+            cache=cache,
+            window=window,
+            bucket=bucket,
+        )
+    for result in results:
+        result.update(output_pdf=output_pdf, rows=rows[result["uid"]])
+        if not result["ok"]:
+            print(f"...failed {result['uid']}: {result['error']}")
+    if isinstance(output_pdf, str):
+        print(f"...generating {output_pdf}")
+    return results
@@ -0,0 +1,298 @@
+"""
+Long running report server.
+
+Keeps a pool of warmed worker processes, with matplotlib, seaborn and reportlab
+imported and their fonts and colour maps loaded, so each report only pays for
+its own aggregation and rendering.
+
+    python -m SBReportGenerator.server --port 8155 --jobs 4
+
+Endpoints:
+- POST /report?chart_format=png&stats_backend=dict&window=14&bucket=day with the user_productions log
+  as the request body. Responds with the PDF bytes.
+- GET /stats with the request counts and latency percentiles, as JSON.
+- GET /health
+
+If a worker dies, e.g. killed for running out of memory, its requests fail
+with 503 and the pool is replaced by a new, warmed one.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from importlib.resources import files
+from urllib.parse import parse_qs, urlparse
+
+from .report_core import _get_render_cache, _get_stats_backend, _init_report_worker
+from utils.user_dates import check_bucket
+from utils.user_stats import CHART_FORMATS, DailyStatsBuilder, UserStats
+
+PERCENTILES = (50, 90, 95, 99)
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+
+def _init_server_worker(chart_format="png", ready=None):
+    """
+    Warms a server worker process: imports the plotting and pdf libraries, then
+    renders the bundled example report once so the matplotlib and reportlab
+    fonts, the word table colour map and the logo are loaded before the first
+    request arrives. Reports its pid on the ready queue once done.
+    """
+    _init_report_worker()
+    example = files("SBReportGenerator").joinpath("data", "user_productions_example.txt")
+    _render_report(example.read_bytes(), chart_format=chart_format)
+    if ready is not None:
+        ready.put(os.getpid())
+
+
+def _render_report(
+    body, chart_format="png", stats_backend="dict", cache=None, window=14, bucket="day"
+):
+    """
+    Renders the report of one user's log, the bytes of a request body, and
+    returns the PDF bytes. The dict backend aggregates the body line by line,
+    like generate_user_report does with a file.
+    """
+    stats_class = _get_stats_backend(stats_backend)
+    if stats_class is UserStats:
+        builder = DailyStatsBuilder().update(io.TextIOWrapper(io.BytesIO(body), encoding="utf-8"))
+        if not builder.rows:
+            raise ValueError("Empty user_productions")
+        user_stats = UserStats.from_builder(builder)
+    else:
+        lines = body.decode("utf-8").splitlines()
+        if not any(line.strip() for line in lines):
+            raise ValueError("Empty user_productions")
+        user_stats = stats_class(lines)
+    return user_stats.create_pdf_report(
+        chart_format=chart_format,
+        cache=_get_render_cache(cache),
+        window=window,
+        bucket=bucket,
+    )
+
+
+class LatencyStats:
+    """
+    Thread safe record of the latencies of the most recent requests.
+
+    :param window: Number of most recent requests the percentiles are computed over.
+    """
+
+    def __init__(self, window=1000):
+        self.latencies = deque(maxlen=window)
+        self.counts = {"ok": 0, "client_error": 0, "server_error": 0}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finish(self, seconds, status):
+        with self._lock:
+            self.in_flight -= 1
+            self.latencies.append(seconds)
+            self.counts[status] += 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            snapshot = {"in_flight": self.in_flight, **self.counts}
+        snapshot["window"] = len(latencies)
+        for percentile in PERCENTILES:
+            value = None
+            if latencies:
+                # Nearest rank percentile
+                rank = max(-(-percentile * len(latencies) // 100), 1)
+                value = round(latencies[rank - 1] * 1000, 1)
+            snapshot[f"p{percentile}_ms"] = value
+        snapshot["max_ms"] = round(latencies[-1] * 1000, 1) if latencies else None
+        return snapshot
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    server_version = "SBReportServer/0.1"
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/stats":
+            self._send_json(
+                200, dict(self.server.latency.snapshot(), pool_restarts=self.server.pool_restarts)
+            )
+        elif path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": f"Unknown path {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/report":
+            self._send_json(404, {"error": f"Unknown path {url.path}"})
+            return
+        self.server.latency.start()
+        start = time.perf_counter()
+        status = "ok"
+        executor = None
+        try:
+            options = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            chart_format = options.pop("chart_format", self.server.chart_format)
+            stats_backend = options.pop("stats_backend", "dict")
+            bucket = options.pop("bucket", "day")
+            window = options.pop("window", "14")
+            if not window.isdigit():
+                raise ValueError(f"window must be a positive number of buckets, got {window!r}")
+            check_bucket(bucket)
+            if options:
+                raise ValueError(f"Unknown options: {sorted(options)}")
+            if chart_format not in CHART_FORMATS:
+                raise ValueError(
+                    f"chart_format must be one of {CHART_FORMATS}, got {chart_format!r}"
+                )
+            _get_stats_backend(stats_backend)
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            executor = self.server.get_executor()
+            pdf = executor.submit(
+                _render_report,
+                body,
+                chart_format=chart_format,
+                stats_backend=stats_backend,
+                cache=self.server.cache,
+                window=int(window),
+                bucket=bucket,
+            ).result()
+        except ValueError as e:
+            status = "client_error"
+            self._send_json(400, {"error": str(e)})
+        except BrokenProcessPool as e:
+            # A worker died; the pool cannot be used any more
+            status = "server_error"
+            self.server.restart_pool(executor)
+            self._send_json(503, {"error": f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            status = "server_error"
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(pdf)))
+            self.end_headers()
+            for offset in range(0, len(pdf), RESPONSE_CHUNK_SIZE):
+                self.wfile.write(pdf[offset:offset + RESPONSE_CHUNK_SIZE])
+        finally:
+            self.server.latency.finish(time.perf_counter() - start, status)
+
+    def _send_json(self, code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class ReportServer(ThreadingHTTPServer):
+    """
+    HTTP server rendering reports in a pool of warmed worker processes.
+
+    :param address: (host, port) to listen on.
+    :param jobs: Number of worker processes, None for one per CPU.
+    :param chart_format: Default chart format of the reports, also the one the workers are warmed with.
+    :param cache: (Optional) Render cache directory shared by the workers.
+    :param quiet: Do not log every request.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, jobs=None, chart_format="png", cache=None, quiet=False):
+        super().__init__(address, ReportRequestHandler)
+        self.chart_format = chart_format
+        self.cache = cache.directory if hasattr(cache, "directory") else cache
+        self.quiet = quiet
+        self.latency = LatencyStats()
+        self.jobs = jobs or os.cpu_count() or 1
+        self.pool_restarts = 0
+        self._ready = multiprocessing.Queue()
+        self._pool_lock = threading.Lock()
+        self.executor = self._start_pool()
+
+    def _start_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.jobs,
+            initializer=_init_server_worker,
+            initargs=(self.chart_format, self._ready),
+        )
+
+    def get_executor(self):
+        """
+        Returns the current worker pool, waiting while it is being restarted.
+        """
+        with self._pool_lock:
+            return self.executor
+
+    def warm_up(self, timeout=120):
+        """
+        Starts the worker processes and waits until they have all finished
+        warming up. Returns their pids.
+        """
+        # Workers are started by the first submits, a new one per submit while none is idle
+        for future in [self.executor.submit(os.getpid) for _ in range(self.jobs)]:
+            future.result()
+        return [self._ready.get(timeout=timeout) for _ in range(self.jobs)]
+
+    def restart_pool(self, broken):
+        """
+        Replaces the broken pool by a new one and warms it up. Requests that
+        failed on the same pool only restart it once.
+        """
+        with self._pool_lock:
+            if broken is None or self.executor is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._start_pool()
+            self.pool_restarts += 1
+            self.warm_up()
+
+    def server_close(self):
+        super().server_close()
+        self.get_executor().shutdown(wait=True, cancel_futures=True)
+
+
+def serve(host="127.0.0.1", port=8155, jobs=None, chart_format="png", cache=None):
+    """
+    Runs a ReportServer until interrupted.
+    """
+    with ReportServer((host, port), jobs=jobs, chart_format=chart_format, cache=cache) as server:
+        server.warm_up()
+        print(f"Serving reports on http://{host}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SayBanana report server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8155)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes, default one per CPU")
+    parser.add_argument("--chart-format", choices=CHART_FORMATS, default="png")
+    parser.add_argument("--cache", default=None, help="render cache directory")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.jobs, args.chart_format, args.cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Caseload report: the reports of many users drawn into one pdf, e.g. all the
+children a therapist follows, one section per user after a table of contents,
+with a bookmark per user in the viewer's outline.
+
+The fonts, the logo and the word table colour scale are stored once in the
+document and referenced by every section. Each page is compressed as soon as
+it is finished and each user's statistics are released once their section is
+drawn. reportlab still writes the file on save only, so the compressed pages
+and the chart images are held until then.
+"""
+from utils.instrumentation import span
+from utils.pdf_maker import (
+    PAGE_WIDTH,
+    compress_finished_pages,
+    init_pdf,
+    set_image,
+    set_text,
+    set_title,
+)
+from utils.user_dates import get_from_date
+from utils.user_stats import DATA_PATH, MARGIN_X, check_report_options
+
+CONTENTS_ROWS_PER_PAGE = 32
+CONTENTS_TOP = 596  # baseline of the first row of the table of contents
+CONTENTS_ROW_HEIGHT = 16
+CONTENTS_FONT_SIZE = 11
+
+
+def contents_page_count(users):
+    """
+    Number of pages the table of contents of a caseload of users takes.
+    """
+    return max(-(-users // CONTENTS_ROWS_PER_PAGE), 1)
+
+
+def _section_key(index):
+    return f"section{index}"
+
+
+def _page_number_form(index):
+    return f"ContentsPage{index}"
+
+
+def _contents_row_y(index):
+    return CONTENTS_TOP - (index % CONTENTS_ROWS_PER_PAGE) * CONTENTS_ROW_HEIGHT
+
+
+def _draw_contents_header(pdf, users, date_generated, page, pages):
+    set_title(pdf, title="Say Bananas! Caseload Report", height=730)
+    set_image(pdf=pdf, x=MARGIN_X, y=700, max_height=70, image=f"{DATA_PATH}/say66_logo.png")
+    set_text(pdf=pdf, text=f"Date Generated:  {date_generated}", x=MARGIN_X, y=675)
+    set_text(pdf=pdf, text=f"Players:  {users}", x=MARGIN_X, y=650)
+    heading_y = CONTENTS_TOP + CONTENTS_ROW_HEIGHT + 6
+    contents = "Contents" if pages == 1 else f"Contents ({page + 1} of {pages})"
+    set_text(pdf=pdf, text=contents, x=MARGIN_X, y=heading_y, font_name="Helvetica-Bold")
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawRightString(PAGE_WIDTH - MARGIN_X, heading_y, "Page")
+
+
+def _draw_contents(pdf, uids, date_generated):
+    """
+    Draws the table of contents, one linked row per user. The page numbers are
+    not known yet: each row shows a form that is only defined once the user's
+    section is drawn, see _define_page_numbers.
+    """
+    pages = contents_page_count(len(uids))
+    _draw_contents_header(pdf, len(uids), date_generated, 0, pages)
+    for index, uid in enumerate(uids):
+        if index and not index % CONTENTS_ROWS_PER_PAGE:
+            pdf.showPage()
+            _draw_contents_header(
+                pdf, len(uids), date_generated, index // CONTENTS_ROWS_PER_PAGE, pages
+            )
+        y = _contents_row_y(index)
+        set_text(pdf=pdf, text=uid, x=MARGIN_X, y=y, font_size=CONTENTS_FONT_SIZE)
+        pdf.doForm(_page_number_form(index))
+        pdf.linkRect(
+            uid,
+            _section_key(index),
+            (MARGIN_X, y - 4, PAGE_WIDTH - MARGIN_X, y + CONTENTS_FONT_SIZE),
+            relative=1,
+        )
+    pdf.showPage()
+
+
+def _define_page_numbers(pdf, results):
+    for index, result in enumerate(results):
+        text = str(result["page"]) if result["ok"] else f"(no report)  {result['page']}"
+        pdf.beginForm(_page_number_form(index))
+        pdf.setFont("Helvetica", CONTENTS_FONT_SIZE)
+        pdf.drawRightString(PAGE_WIDTH - MARGIN_X, _contents_row_y(index), text)
+        pdf.endForm()
+
+
+def _draw_failed_section(pdf, uid, error):
+    set_text(pdf=pdf, text=f"Player User ID:   {uid}", x=MARGIN_X, y=700)
+    set_text(pdf=pdf, text="No report could be generated for this player:", x=MARGIN_X, y=670)
+    set_text(pdf=pdf, text=error, x=MARGIN_X, y=650, font_size=10)
+
+
+def create_caseload_pdf(
+    uids,
+    load_user_stats,
+    filename,
+    chart_format="png",
+    cache=None,
+    window=14,
+    bucket="day",
+):
+    """
+    Draws the reports of many users into one pdf: a table of contents linking
+    to each user's section, then the sections in the order of uids, each
+    starting on a new page and bookmarked under the user's uid.
+
+    A user whose statistics cannot be loaded or drawn gets a section saying so,
+    and the others are still drawn.
+
+    Parameters:
+    uids (list[str]): The users, in the order of the contents.
+    load_user_stats (callable): load_user_stats(uid) returns the UserStats of a user.
+        Called once per user, just before their section is drawn.
+    filename (str | file): File path where the PDF will be saved, or a writable binary stream.
+    chart_format, cache, window, bucket: See UserStats.create_pdf_report.
+
+    Returns:
+    list[dict]: One summary per user, in the order of uids, with the keys "uid",
+    "page" (the first page of their section), "pages", "ok" and "error".
+    """
+    check_report_options(chart_format, window, bucket)
+    date_generated = get_from_date(from_today=True)
+    pdf = init_pdf(filename=filename)
+    pdf.setTitle("Say Bananas! Caseload Report")
+    compress_finished_pages(pdf)
+
+    pdf.bookmarkPage("contents")
+    pdf.addOutlineEntry("Contents", "contents", level=0)
+    with span("contents", users=len(uids)):
+        _draw_contents(pdf, uids, date_generated)
+
+    results = []
+    for index, uid in enumerate(uids):
+        result = {"uid": uid, "page": pdf.getPageNumber()}
+        pdf.bookmarkPage(_section_key(index))
+        pdf.addOutlineEntry(uid, _section_key(index), level=0)
+        drawing = False
+        try:
+            with span("report", uid=uid):
+                user_stats = load_user_stats(uid)
+                drawing = True
+                with span("draw_pdf_pages", chart_format=chart_format):
+                    user_stats.draw_pdf_pages(
+                        pdf,
+                        chart_format=chart_format,
+                        cache=cache,
+                        window=window,
+                        bucket=bucket,
+                        date_generated=date_generated,
+                    )
+            result.update(ok=True, error=None)
+        except Exception as e:
+            result.update(ok=False, error=f"{type(e).__name__}: {e}")
+            if drawing:
+                # Keep whatever was drawn, the notice goes on a page of its own
+                pdf.showPage()
+            _draw_failed_section(pdf, uid, result["error"])
+        # Released before the next user is loaded
+        user_stats = None
+        pdf.showPage()
+        result["pages"] = pdf.getPageNumber() - result["page"]
+        results.append(result)
+
+    _define_page_numbers(pdf, results)
+    pdf.showOutline()
+    with span("pdf.save"):
+        pdf.save()
+    return results
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+
+from utils.user_stats import DailyStatsBuilder, iter_user_productions
+
+CHECKPOINT_VERSION = 4
+CHUNK_SIZE = 1 << 20
+
+
+def _hash_prefix(file, length):
+    """
+    Returns a sha256 object fed with the first length bytes of an open binary file,
+    leaving the file positioned at length. None if the file is shorter.
+    """
+    digest = hashlib.sha256()
+    remaining = length
+    while remaining:
+        chunk = file.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            return None
+        digest.update(chunk)
+        remaining -= len(chunk)
+    return digest
+
+
+def load_checkpoint(checkpoint_path):
+    """
+    Loads a checkpoint saved by save_checkpoint, or returns None if there is no
+    usable one (missing, unreadable or written by another version).
+    """
+    try:
+        with open(checkpoint_path, "r", encoding="utf-8") as file:
+            checkpoint = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        return None
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_path, builder, offset, sha256):
+    """
+    Atomically writes the aggregation state of builder together with the byte
+    offset and sha256 hex digest of the part of the log it covers.
+    """
+    directory = os.path.dirname(os.path.abspath(checkpoint_path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{checkpoint_path}.tmp"
+    checkpoint = {
+        "version": CHECKPOINT_VERSION,
+        "offset": offset,
+        "sha256": sha256,
+        "builder": builder.to_state(),
+    }
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        # dumps uses the C encoder, dump streams through the pure Python one
+        file.write(json.dumps(checkpoint))
+    os.replace(tmp_path, checkpoint_path)
+
+
+def aggregate_incrementally(productions_path, checkpoint_path):
+    """
+    Aggregates a user_productions.txt file, resuming from the checkpoint at
+    checkpoint_path so that only the lines appended since the last run are parsed.
+    The checkpoint is updated afterwards. If the already processed part of the
+    file has changed (edited, truncated or replaced) the file is aggregated from
+    the start instead.
+
+    A trailing line without a newline is counted in the result but not in the
+    checkpoint, as the app may still be writing it. If it does not parse yet it
+    is left out; it is read again on the next run.
+
+    Parameters:
+    productions_path (str): Path to the user_productions.txt file.
+    checkpoint_path (str): Path of the checkpoint file, created if missing.
+
+    Returns:
+    tuple: (DailyStatsBuilder, bool) the aggregates and whether the checkpoint was resumed.
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    with open(productions_path, "rb") as file:
+        builder, digest, offset = None, None, 0
+        if checkpoint is not None:
+            digest = _hash_prefix(file, checkpoint["offset"])
+            if digest is not None and digest.hexdigest() == checkpoint["sha256"]:
+                builder = DailyStatsBuilder.from_state(checkpoint["builder"])
+                offset = checkpoint["offset"]
+        resumed = builder is not None
+        if not resumed:
+            file.seek(0)
+            builder, digest = DailyStatsBuilder(), hashlib.sha256()
+
+        pending = b""
+        while True:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            chunk = pending + chunk
+            end = chunk.rfind(b"\n") + 1
+            complete, pending = chunk[:end], chunk[end:]
+            if complete:
+                builder.update(complete.decode("utf-8").splitlines())
+                digest.update(complete)
+                offset += len(complete)
+
+    save_checkpoint(checkpoint_path, builder, offset, digest.hexdigest())
+    if pending.strip():
+        try:
+            rows = list(iter_user_productions([pending.decode("utf-8")]))
+        except (UnicodeDecodeError, ValueError):
+            # Half written, e.g. "uid,Word,1,01-0"
+            rows = []
+        for row in rows:
+            builder.add(*row)
+    return builder, resumed
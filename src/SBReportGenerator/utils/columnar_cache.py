@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.columnar_stats import read_productions_frame
+
+# Bump when the layout of the cached columns changes
+COLUMNAR_CACHE_VERSION = 2
+META_FILE = "meta.json"
+ARRAY_FILES = {
+    "uid": "uid_codes.npy",
+    "word": "word_codes.npy",
+    "grade": "grades.npy",
+    "timestamp": "timestamps.npy",
+}
+
+
+def columnar_cache_path(source_path, cache_dir=None):
+    """
+    Returns the directory holding the binary columns of source_path: next to
+    the log as '<log>.columns' by default, or inside cache_dir. Logs of different
+    children usually share a name, so the entries in a cache_dir are named after
+    a hash of the log's full path as well.
+    """
+    if cache_dir is None:
+        return f"{source_path}.columns"
+    real_path = os.path.realpath(source_path)
+    digest = hashlib.sha1(real_path.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(real_path)}-{digest}.columns")
+
+
+def _source_signature(source_path):
+    stat = os.stat(source_path)
+    return {
+        "path": os.path.realpath(source_path),
+        "dev": stat.st_dev,
+        "ino": stat.st_ino,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def write_columnar_cache(source_path, cache_dir=None, frame=None):
+    """
+    Converts a user_productions.txt log into binary columns: int32 uid and word
+    dictionary codes, int8 grades and int64 epoch second timestamps, each an
+    .npy file, plus a meta.json with the dictionaries and the path, inode, size
+    and mtime of the log they were built from.
+
+    Parameters:
+    source_path (str): Path to the user_productions.txt file.
+    cache_dir (str): (Optional) Directory to write the columns in, see columnar_cache_path.
+    frame (pandas.DataFrame): (Optional) The already parsed log, as read_productions_frame.
+
+    Returns:
+    str: The directory the columns were written to.
+    """
+    signature = _source_signature(source_path)
+    if frame is None:
+        frame = read_productions_frame(source_path)
+    path = columnar_cache_path(source_path, cache_dir)
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, META_FILE)
+    # Without a meta.json the columns are never read, so a half written cache is just a miss
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    columns = {
+        "uid": frame["uid"].cat.codes.to_numpy().astype(np.int32),
+        "word": frame["word"].cat.codes.to_numpy().astype(np.int32),
+        "grade": frame["grade"].to_numpy(dtype=np.int8),
+        "timestamp": frame["timestamp"].to_numpy().astype("datetime64[s]").view(np.int64),
+    }
+    for name, values in columns.items():
+        np.save(os.path.join(path, ARRAY_FILES[name]), values)
+    meta = {
+        "version": COLUMNAR_CACHE_VERSION,
+        "source": signature,
+        "rows": len(frame),
+        "uids": [str(uid) for uid in frame["uid"].cat.categories],
+        "words": [str(word) for word in frame["word"].cat.categories],
+    }
+    tmp_path = f"{meta_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(meta, file)
+    os.replace(tmp_path, meta_path)
+    return path
+
+
+def load_columnar_cache(source_path, cache_dir=None, mmap=True):
+    """
+    Loads the columns written by write_columnar_cache as a frame in the format of
+    read_productions_frame, or returns None if there is no cache, the cache was
+    written for another file, or the log has changed (other size or modification
+    time) since it was written.
+
+    With mmap the arrays are memory mapped rather than read, so only the pages
+    actually used are loaded.
+    """
+    path = columnar_cache_path(source_path, cache_dir)
+    try:
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        signature = _source_signature(source_path)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != COLUMNAR_CACHE_VERSION or meta.get("source") != signature:
+        return None
+    mmap_mode = "r" if mmap else None
+    try:
+        columns = {
+            name: np.load(os.path.join(path, file_name), mmap_mode=mmap_mode)
+            for name, file_name in ARRAY_FILES.items()
+        }
+    except (OSError, ValueError):
+        return None
+    if any(len(values) != meta["rows"] for values in columns.values()):
+        return None
+    return pd.DataFrame(
+        {
+            "uid": pd.Categorical.from_codes(columns["uid"], categories=meta["uids"]),
+            "word": pd.Categorical.from_codes(columns["word"], categories=meta["words"]),
+            "grade": columns["grade"],
+            "timestamp": columns["timestamp"].view("datetime64[s]"),
+        }
+    )
+
+
+def read_productions_frame_cached(source_path, cache_dir=None):
+    """
+    read_productions_frame for a log file, going through its binary columnar
+    cache: loaded when up to date, otherwise the log is parsed and the cache
+    (re)written.
+    """
+    frame = load_columnar_cache(source_path, cache_dir)
+    if frame is None:
+        frame = read_productions_frame(source_path)
+        write_columnar_cache(source_path, cache_dir, frame=frame)
+    return frame
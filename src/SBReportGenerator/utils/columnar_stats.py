@@ -0,0 +1,245 @@
+import io
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from utils.user_dates import format_date
+from utils.user_stats import UserStats, DayCounts, GradeCounts, CORRECT, INCORRECT, SKIPPED
+
+COLUMNS = ["uid", "word", "grade", "timestamp"]
+TIMESTAMP_FORMAT = "%d-%m-%Y %H:%M:%S"
+GRADE_COLUMNS = {
+    int(CORRECT): "correct",
+    int(INCORRECT): "incorrect",
+    int(SKIPPED): "skipped",
+}
+
+
+def _parse_timestamps(raw):
+    """
+    Vectorised parse of 'DD-MM-YYYY HH:MM:SS' strings into datetime64[s]. The
+    fixed width layout lets the fields be read straight from the character
+    codes; anything not in that exact layout is returned as NaT.
+    """
+    chars = raw.astype("U19")
+    codes = chars.view(np.uint32).reshape(len(chars), 19).astype(np.int64)
+    digits = codes - ord("0")
+    lengths = np.char.str_len(chars)
+
+    def number(*positions):
+        value = np.zeros(len(chars), dtype=np.int64)
+        for position in positions:
+            value = value * 10 + digits[:, position]
+        return value
+
+    day, month, year = number(0, 1), number(3, 4), number(6, 7, 8, 9)
+    hour, minute, second = number(11, 12), number(14, 15), number(17, 18)
+    digit_columns = [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15, 17, 18]
+    valid = (
+        (lengths == 19)
+        & (raw.astype("U20") == chars)
+        & np.all((digits[:, digit_columns] >= 0) & (digits[:, digit_columns] <= 9), axis=1)
+        & (codes[:, 2] == ord("-"))
+        & (codes[:, 5] == ord("-"))
+        & (codes[:, 10] == ord(" "))
+        & (codes[:, 13] == ord(":"))
+        & (codes[:, 16] == ord(":"))
+        & (month >= 1) & (month <= 12) & (day >= 1)
+        & (hour < 24) & (minute < 60) & (second < 60)
+    )
+    months = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+    days = months.astype("datetime64[D]") + (day - 1)
+    # Days past the end of the month roll over into the next one, reject them
+    valid &= days.astype("datetime64[M]") == months
+    timestamps = days.astype("datetime64[s]") + (hour * 3600 + minute * 60 + second)
+    timestamps[~valid] = np.datetime64("NaT")
+    return timestamps
+
+
+def accuracy_pc(correct, graded):
+    """
+    Vectorised round(correct / graded, 2) * 100, 0.0 where nothing was graded.
+    Python's round is applied once per distinct (correct, graded) pair so the
+    results match the dict based UserStats exactly.
+    """
+    pairs, inverse = np.unique(
+        np.stack([np.asarray(correct), np.asarray(graded)], axis=1),
+        axis=0,
+        return_inverse=True,
+    )
+    values = np.array(
+        [round(c / g, 2) * 100 if g else 0.0 for c, g in pairs.tolist()], dtype=float
+    )
+    return values[inverse.reshape(-1)]
+
+
+def read_productions_frame(source):
+    """
+    Parses a user_productions log into typed columns: categorical uid and word,
+    int8 grade and datetime64 timestamp.
+
+    Parameters:
+    source (str | list): Path to a user_productions.txt file, or the list of its lines.
+
+    Returns:
+    pandas.DataFrame: One row per log line, in file order.
+    """
+    if isinstance(source, list):
+        source = io.StringIO("\n".join(line for line in source if line.strip()))
+    frame = pd.read_csv(
+        source,
+        header=None,
+        names=COLUMNS,
+        dtype={"uid": "category", "word": "category", "grade": "int8", "timestamp": str},
+    )
+    frame["uid"] = frame["uid"].cat.rename_categories(
+        frame["uid"].cat.categories.str.strip()
+    )
+    raw_timestamps = frame["timestamp"].fillna("")
+    timestamps = pd.Series(_parse_timestamps(raw_timestamps.to_numpy()), index=frame.index)
+    missing = timestamps.isna()
+    if missing.any():
+        # Older app versions logged other date formats, normalise each distinct one once
+        date_time = raw_timestamps[missing].str.partition(" ")
+        dates = date_time[0].map({d: format_date(d) for d in date_time[0].unique()})
+        timestamps[missing] = pd.to_datetime(
+            dates + " " + date_time[2], format=TIMESTAMP_FORMAT, errors="coerce"
+        )
+    if timestamps.isna().any():
+        row = timestamps.isna().to_numpy().argmax()
+        raise ValueError(
+            f"Invalid timestamp {raw_timestamps.iloc[row]!r} on row {row + 1}"
+        )
+    frame["timestamp"] = timestamps
+    return frame
+
+
+class ColumnarUserStats(UserStats):
+    """
+    UserStats backend computing the daily and per word aggregates with grouped,
+    vectorised pandas operations over typed columns instead of nested dicts.
+    day_counts, daily_stats and daily_data are only built, in the usual shapes,
+    when they are first accessed.
+    """
+
+    def __init__(self, up_contents):
+        self._init_from_frame(read_productions_frame(list(up_contents)))
+
+    @classmethod
+    def from_file(cls, path, columnar_cache=None):
+        """
+        Loads the stats of a log file. With columnar_cache, a directory, the
+        parsed log is kept there as memory mappable binary columns so that later
+        loads of the unchanged file skip the text parsing, see utils/columnar_cache.py.
+        """
+        stats = cls.__new__(cls)
+        if columnar_cache is None:
+            frame = read_productions_frame(path)
+        else:
+            from utils.columnar_cache import read_productions_frame_cached
+
+            frame = read_productions_frame_cached(path, columnar_cache)
+        stats._init_from_frame(frame)
+        return stats
+
+    def _init_from_frame(self, frame):
+        uids = frame["uid"].unique()
+        if len(uids) != 1:
+            raise ValueError(f"Expected exactly one UID, found: {sorted(uids)}")
+        self.uid = str(uids[0])
+        # A repeated timestamp replaces the earlier entry, as in DailyStatsBuilder
+        self.frame = frame.drop_duplicates(subset="timestamp", keep="last").assign(
+            day=lambda f: f["timestamp"].dt.normalize()
+        )
+        self.word_counts = self._get_word_counts()
+        self.daily_totals = self._get_daily_totals()
+
+    def _get_word_counts(self):
+        # Keep (day, word) in order of first appearance, like the dict backend does
+        cells = pd.MultiIndex.from_frame(
+            self.frame[["day", "word"]].drop_duplicates()
+        )
+        counts = (
+            self.frame.groupby(["day", "word", "grade"], observed=True)
+            .size()
+            .unstack("grade", fill_value=0)
+            .reindex(index=cells, columns=list(GRADE_COLUMNS), fill_value=0)
+            .rename(columns=GRADE_COLUMNS)
+        )
+        counts["word_accuracy_pc"] = accuracy_pc(
+            counts["correct"], counts["correct"] + counts["incorrect"]
+        )
+        return counts
+
+    def _get_daily_totals(self):
+        totals = self.word_counts.groupby(level="day", sort=False)[
+            ["correct", "incorrect", "skipped"]
+        ].sum()
+        totals.columns = ["words_correct", "words_incorrect", "words_skipped"]
+        totals["words_total"] = totals["words_correct"] + totals["words_incorrect"]
+        totals["words_accuracy_pc"] = accuracy_pc(
+            totals["words_correct"], totals["words_total"]
+        )
+        return totals
+
+    @cached_property
+    def day_counts(self):
+        day_counts = {}
+        for day, totals in zip(
+            self.daily_totals.index.strftime("%d-%m-%Y"),
+            self.daily_totals.itertuples(index=False),
+        ):
+            day_counts[day] = DayCounts(
+                int(totals.words_correct), int(totals.words_incorrect), int(totals.words_skipped)
+            )
+        days = self.word_counts.index.get_level_values("day").strftime("%d-%m-%Y")
+        words = self.word_counts.index.get_level_values("word")
+        for day, word, counts in zip(days, words, self.word_counts.itertuples(index=False)):
+            day_counts[day].by_word[word] = GradeCounts(
+                int(counts.correct), int(counts.incorrect), int(counts.skipped)
+            )
+        return day_counts
+
+    @cached_property
+    def daily_stats(self):
+        daily_stats = {}
+        for day, totals in zip(
+            self.daily_totals.index.strftime("%d-%m-%Y"),
+            self.daily_totals.itertuples(index=False),
+        ):
+            daily_stats[day] = {
+                "words_correct": int(totals.words_correct),
+                "words_incorrect": int(totals.words_incorrect),
+                "words_skipped": int(totals.words_skipped),
+                "words_total": int(totals.words_total),
+                "words_accuracy_pc": float(totals.words_accuracy_pc),
+                "by_word": {},
+            }
+        days = self.word_counts.index.get_level_values("day").strftime("%d-%m-%Y")
+        words = self.word_counts.index.get_level_values("word")
+        for day, word, counts in zip(days, words, self.word_counts.itertuples(index=False)):
+            daily_stats[day]["by_word"][word] = {
+                "correct": int(counts.correct),
+                "incorrect": int(counts.incorrect),
+                "skipped": int(counts.skipped),
+                "word_accuracy_pc": float(counts.word_accuracy_pc),
+            }
+        return daily_stats
+
+    @cached_property
+    def daily_data(self):
+        daily_data = {}
+        days = self.frame["day"].dt.strftime("%d-%m-%Y")
+        times = self.frame["timestamp"].dt.strftime("%H:%M:%S")
+        grades = self.frame["grade"].astype(str)
+        for day, time, word, grade in zip(days, times, self.frame["word"], grades):
+            daily_data.setdefault(day, {})[time] = (word, grade)
+        return daily_data
+
+    def get_ordered_dates(self, reversed=False):
+        days = self.daily_totals.index.sort_values(ascending=not reversed)
+        return list(days.strftime("%d-%m-%Y"))
+
+    def get_all_words_list(self):
+        return sorted(self.word_counts.index.get_level_values("word").unique())
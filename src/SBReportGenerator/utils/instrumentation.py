@@ -0,0 +1,251 @@
+"""
+Named timing spans around the stages of the report pipeline.
+
+Spans are only recorded while instrumentation is enabled, e.g.
+
+    with instrument(JsonLinesSink("spans.jsonl"), LoggingSink()):
+        generate_user_report("user_productions.txt", "report.pdf")
+
+Otherwise span() returns a shared no-op context manager, so the stages pay a
+single function call. Each finished span is passed to every sink as a dict:
+
+    {"name": "bar_chart", "duration_ms": 8.1, "start": 1700000000.0, "depth": 1,
+     "parent": "report", "pid": 1234, "attrs": {...}}
+
+plus "error" when the stage raised, and "memory_kb"/"peak_kb" when memory is
+traced. Spans are recorded per process: the work of batch worker processes
+(generate_user_reports with jobs > 1) is not seen by the sinks of the parent.
+"""
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+_NULL_SPAN = contextlib.nullcontext()
+_sinks = []
+_trace_memory = False
+_local = threading.local()
+
+logger = logging.getLogger("SBReportGenerator.instrumentation")
+
+
+class LoggingSink:
+    """
+    Logs every span, by default to the SBReportGenerator.instrumentation logger at INFO.
+    """
+
+    def __init__(self, logger=logger, level=logging.INFO):
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, event):
+        attrs = "".join(f" {key}={value}" for key, value in event["attrs"].items())
+        error = f" error={event['error']}" if "error" in event else ""
+        self.logger.log(
+            self.level,
+            "%s%s %.1f ms%s%s",
+            "  " * event["depth"],
+            event["name"],
+            event["duration_ms"],
+            attrs,
+            error,
+        )
+
+
+class JsonLinesSink:
+    """
+    Appends every span as one JSON object per line to a file path or an open text file.
+    """
+
+    def __init__(self, file):
+        self._owned = isinstance(file, (str, os.PathLike))
+        self.file = open(file, "a", encoding="utf-8") if self._owned else file
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event, default=str) + "\n"
+        with self._lock:
+            self.file.write(line)
+            self.file.flush()
+
+    def close(self):
+        if self._owned:
+            self.file.close()
+
+
+class CallbackSink:
+    """
+    Calls callback(event) for every span. Any callable can be used as a sink
+    directly; this only gives it a name.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def __call__(self, event):
+        self.callback(event)
+
+
+def enabled():
+    return bool(_sinks)
+
+
+def span(name, **attrs):
+    """
+    Context manager timing the stage name. attrs are reported with the span.
+    A no-op unless instrumentation is enabled.
+    """
+    if not _sinks:
+        return _NULL_SPAN
+    return _Span(name, attrs)
+
+
+def traced(name):
+    """
+    Decorator running every call of the function in a span called name.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _sinks:
+                return function(*args, **kwargs)
+            with _Span(name, {}):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "start", "wall_start", "parent", "memory")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        if _trace_memory:
+            import tracemalloc
+
+            self.memory = tracemalloc.get_traced_memory()[0]
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration = time.perf_counter() - self.start
+        stack = _stack()
+        stack.pop()
+        event = {
+            "name": self.name,
+            "duration_ms": round(duration * 1000, 3),
+            "start": self.wall_start,
+            "depth": len(stack),
+            "parent": self.parent,
+            "pid": os.getpid(),
+            "attrs": self.attrs,
+        }
+        if exc_type is not None:
+            event["error"] = exc_type.__name__
+        if _trace_memory:
+            import tracemalloc
+
+            current, peak = tracemalloc.get_traced_memory()
+            event["memory_kb"] = round((current - self.memory) / 1024, 1)
+            event["peak_kb"] = round(peak / 1024, 1)
+        _emit(event)
+        return False
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _emit(event):
+    for sink in list(_sinks):
+        try:
+            sink(event)
+        except Exception:
+            # A broken sink must not fail the report
+            logger.exception("Instrumentation sink %r failed", sink)
+
+
+@contextlib.contextmanager
+def instrument(*sinks, profile=None, trace_memory=False, profile_top=20):
+    """
+    Enables the spans for the duration of the block, sending them to sinks.
+
+    Parameters:
+    sinks: Callables taking a span event dict, e.g. LoggingSink, JsonLinesSink or CallbackSink.
+    profile (str): (Optional) Runs the block under cProfile and dumps the stats to this path,
+        readable with pstats or snakeviz. A "profile" event with the slowest functions is also sent.
+    trace_memory (bool): Traces allocations with tracemalloc and adds the memory a span
+        retained and the peak so far to its event. Slows the block down noticeably.
+    profile_top (int): Number of functions, by cumulative time, in the "profile" event.
+    """
+    global _trace_memory
+    started_tracing = False
+    if trace_memory:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+    previous_trace_memory = _trace_memory
+    _trace_memory = _trace_memory or trace_memory
+    _sinks.extend(sinks)
+    profiler = None
+    if profile is not None:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile)
+            _emit(_profile_event(profiler, profile, profile_top))
+        for sink in sinks:
+            _sinks.remove(sink)
+        _trace_memory = previous_trace_memory
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _profile_event(profiler, path, top):
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    functions = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:top]
+    return {
+        "name": "profile",
+        "duration_ms": round(stats.total_tt * 1000, 3),
+        "start": None,
+        "depth": 0,
+        "parent": None,
+        "pid": os.getpid(),
+        "attrs": {
+            "path": path,
+            "top_cumulative": [
+                {
+                    "function": f"{file}:{line}({function})",
+                    "calls": calls,
+                    "total_ms": round(total * 1000, 3),
+                    "cumulative_ms": round(cumulative * 1000, 3),
+                }
+                for (file, line, function), (_, calls, total, cumulative, _) in functions
+            ],
+        },
+    }
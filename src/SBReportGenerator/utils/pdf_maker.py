@@ -1,9 +1,22 @@
 from reportlab.pdfgen import canvas
+from reportlab.pdfgen.canvas import _buildColorFunction, _normalizeColors
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfbase import pdfmetrics
 from reportlab.lib.utils import ImageReader
+from reportlab.lib import colors
+from reportlab.pdfbase import pdfdoc
 from PIL import Image
-import io
+from functools import lru_cache
+import os
+import weakref
+
+from utils.instrumentation import traced
+
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+
+# Colour scale shadings registered in each pdf, see draw_colour_scale
+_colour_scales = weakref.WeakKeyDictionary()
 
 
 def draw_ruler(pdf, font_size=12):
@@ -26,6 +39,10 @@ def draw_ruler(pdf, font_size=12):
 
 
 def init_pdf(filename="reports/SayBananaReport.pdf"):
+    """
+    Creates the report canvas. filename is a file path or a writable binary
+    stream, e.g. io.BytesIO, the pdf is written to on save.
+    """
     pdf = canvas.Canvas(filename, pagesize=letter)
     return pdf
 
@@ -38,33 +55,51 @@ def set_title(pdf, title="Your Say Bananas! Activity", fontisize=22, height=725)
     pdf.drawString(x, height, title)
 
 
+@lru_cache(maxsize=32)
+def _load_image_reader(path, mtime_ns):
+    reader = ImageReader(path)
+    # Decoded now, so every pdf the reader is drawn into reuses the pixels
+    reader.getRGBData()
+    return reader
+
+
+def image_reader(path):
+    """
+    Returns an ImageReader of the image file at path, decoded on first use and
+    again only when the file is modified. canvas.drawImage stores it once per
+    pdf however often it is drawn.
+    """
+    return _load_image_reader(os.path.abspath(path), os.stat(path).st_mtime_ns)
+
+
+@traced("set_image")
 def set_image(pdf, image, x, y, max_width=None, max_height=None):
     """
     Add and scale down an image to fit within specified maximum width or height on a PDF page,
-    while maintaining its aspect ratio. Supports both file path and PIL Image object.
+    while maintaining its aspect ratio. Supports file paths, in-memory image buffers
+    and PIL Image objects.
+
+    Image files are treated as static assets (e.g. the logo): they are decoded
+    once per process, see image_reader.
 
     :param pdf: The canvas object to add the image to.
-    :param image: The path to the image or a PIL Image object.
+    :param image: The path to the image, a binary file-like object (e.g. io.BytesIO)
+        or a PIL Image object.
     :param x: The x-coordinate of the lower-left corner of the image.
     :param y: The y-coordinate of the lower-left corner of the image.
     :param max_width: (Optional) The maximum width the image should be scaled to.
     :param max_height: (Optional) The maximum height the image should be scaled to.
     """
     if isinstance(image, str):
-        # If the input is a file path
+        img = image_reader(image)
+    elif hasattr(image, "read") or isinstance(image, Image.Image):
+        # In-memory buffers, and PIL images as they are rather than re-encoded to PNG first
         img = ImageReader(image)
-        iw, ih = img.getSize()
-    elif isinstance(image, Image.Image):
-        # If the input is a PIL Image object
-        iw, ih = image.size
-        buf = io.BytesIO()
-        image.save(buf, format="PNG")
-        buf.seek(0)
-        img = ImageReader(buf)
     else:
         raise ValueError(
-            "Invalid image input. Must be a file path or a PIL Image object."
+            "Invalid image input. Must be a file path, a file-like object or a PIL Image object."
         )
+    iw, ih = img.getSize()
 
     aspect_ratio = iw / float(ih)
 
@@ -85,9 +120,87 @@ def set_image(pdf, image, x, y, max_width=None, max_height=None):
     # Draw the image on the canvas with the new dimensions
     pdf.drawImage(img, x, y, new_width, new_height, mask="auto")
 
-    # Close the buffer if it was created
-    if isinstance(image, Image.Image):
-        buf.close()
+
+def draw_colour_scale(pdf, colours, x, y, width, height):
+    """
+    Fills the rectangle with a vertical gradient from colours[0] at the bottom
+    to colours[1] at the top. The gradient is stored once per pdf and reused by
+    every colour scale with the same colours, where canvas.linearGradient adds
+    a new shading object on each call.
+
+    Uses canvas internals: reportlab is pinned to the tested major version and
+    tests/test_caseload.py checks the output.
+    """
+    shadings = _colour_scales.setdefault(pdf, {})
+    colour_space, colour_values = _normalizeColors(colours)
+    key = (colour_space, repr(colour_values))
+    name = shadings.get(key)
+    if name is None:
+        # Defined over the unit square, placed by the transformation below
+        shading = pdfdoc.PDFAxialShading(
+            0, 0, 0, 1,
+            Function=_buildColorFunction(colour_values, None),
+            ColorSpace=colour_space,
+            Extend="[false false]",
+        )
+        name = shadings[key] = pdf._doc.addShading(shading)
+    pdf._shadingUsed[name] = name
+    path = pdf.beginPath()
+    path.rect(0, 0, 1, 1)
+    pdf.saveState()
+    pdf.translate(x, y)
+    pdf.scale(width, height)
+    pdf.clipPath(path, stroke=0, fill=0)
+    pdf._code.append(f"/{name} sh")
+    pdf.restoreState()
+
+
+def compress_finished_pages(pdf):
+    """
+    Deflates the content of each page as soon as it is finished by showPage.
+    reportlab keeps every page of a document until save, and only compresses
+    them then, so long documents otherwise hold all their pages uncompressed.
+
+    Uses document internals, see draw_colour_scale.
+    """
+    def compress_page(page_number):
+        page = pdf._doc.Pages.pages[-1]
+        content = pdfdoc.PDFStream(
+            dictionary=pdfdoc.PDFDictionary(
+                {"Filter": pdfdoc.PDFArray([pdfdoc.PDFName(pdfdoc.PDFZCompress.pdfname)])}
+            ),
+            content=pdfdoc.PDFZCompress.encode(page.stream),
+        )
+        content.__Comment__ = "page stream"
+        page.Contents = content
+        page.stream = None
+
+    pdf.setPageCallBack(compress_page)
+
+
+def flow_layout(heights, first_top, top, bottom, gap=0):
+    """
+    Stacks blocks of the given heights down the pages, moving a block to a new
+    page when it does not fit above bottom. A block taller than a whole page is
+    placed at the top of its own page.
+
+    :param heights: The height of each block, in drawing order.
+    :param first_top: The y-coordinate the first page's content starts at, below its header.
+    :param top: The y-coordinate the content of the following pages starts at.
+    :param bottom: The lowest y-coordinate a block may reach.
+    :param gap: The vertical space between two blocks.
+    :return: A list with the (page, y) of each block's lower-left corner, pages counted from 0.
+    """
+    placements = []
+    page, page_top = 0, first_top
+    cursor = page_top
+    for height in heights:
+        if cursor - height < bottom and cursor != page_top:
+            page, page_top = page + 1, top
+            cursor = page_top
+        placements.append((page, cursor - height))
+        cursor -= height + gap
+    return placements
 
 
 def set_text(pdf, text, font_size=12, x=None, y=100, font_name="Helvetica"):
@@ -99,3 +212,164 @@ def set_text(pdf, text, font_size=12, x=None, y=100, font_name="Helvetica"):
         text_width = pdfmetrics.stringWidth(text, font_name, font_size)
         x = (page_width - text_width) / 2
     pdf.drawString(x, y, text)
+
+
+# ZapfDingbats is one of the standard pdf fonts, so the ✔ and ✘ marks need no embedded font
+MARK_FONT = "ZapfDingbats"
+CORRECT_MARK = "✔"
+WRONG_MARK = "✘"
+
+
+def _mix(colour_a, colour_b, fraction):
+    return colors.Color(
+        *(a + (b - a) * fraction for a, b in zip(colour_a.rgb(), colour_b.rgb()))
+    )
+
+
+def _relative_luminance(colour):
+    # Same measure seaborn uses to pick a dark or light annotation colour
+    rgb = [c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4 for c in colour.rgb()]
+    return 0.2126 * rgb[0] + 0.7152 * rgb[1] + 0.0722 * rgb[2]
+
+
+def _draw_annotation(pdf, x, y, correct, incorrect, font_size, font_name="Helvetica"):
+    """
+    Draws "correct✔ incorrect✘" centred on (x, y).
+    """
+    parts = [
+        (str(correct), font_name),
+        (CORRECT_MARK, MARK_FONT),
+        (f" {incorrect}", font_name),
+        (WRONG_MARK, MARK_FONT),
+    ]
+    widths = [pdfmetrics.stringWidth(text, font, font_size) for text, font in parts]
+    x -= sum(widths) / 2
+    y -= font_size * 0.35
+    for (text, font), width in zip(parts, widths):
+        pdf.setFont(font, font_size)
+        pdf.drawString(x, y, text)
+        x += width
+
+
+def draw_word_table(
+    pdf,
+    data,
+    x,
+    y,
+    width,
+    height,
+    xlabel="Last 14 Days from Most Recent Activity",
+    font_name="Helvetica",
+):
+    """
+    Draws the accuracy by word table straight onto the canvas: a word by day
+    grid coloured by accuracy, with "correct✔ incorrect✘" in every cell the
+    word was practised, and the colour scale on the right. Matches the look of
+    utils.table_builder.make_word_table without going through pandas,
+    seaborn or an image.
+
+    :param pdf: The canvas object to draw the table on.
+    :param data: The table data, data[dd/mm/yy][word] = (correct, incorrect, skipped, accuracy_pc).
+    :param x: The x-coordinate of the lower-left corner of the table's box.
+    :param y: The y-coordinate of the lower-left corner of the table's box.
+    :param width: The width of the table's box.
+    :param height: The height of the table's box.
+    :param xlabel: (Optional) The title of the date axis.
+    """
+    from utils.plotting import CORRECT_COLOUR, WRONG_COLOUR, MAX_LABELLED_BARS
+    from utils.table_builder import LIGHTGREY
+
+    wrong, correct = colors.toColor(WRONG_COLOUR), colors.toColor(CORRECT_COLOUR)
+    dates = list(data)
+    # Rows in order of first appearance, as in the DataFrame make_word_table builds
+    words = list(dict.fromkeys(word for day in data.values() for word in day))
+
+    title_size, axis_size, tick_size = 12, 9.5, 7
+    pdf.saveState()
+    pdf.setFillColor(colors.black)
+    pdf.setFont(f"{font_name}-Bold", title_size)
+    pdf.drawCentredString(x + width / 2, y + height - title_size, "Accuracy by Word")
+
+    # Grid area, leaving room for the labels around it
+    label_width = max(
+        [pdfmetrics.stringWidth(word, font_name, tick_size) for word in words] or [0]
+    )
+    date_width = max(
+        [pdfmetrics.stringWidth(date, font_name, tick_size) for date in dates] or [0]
+    )
+    grid_left = x + axis_size + 6 + label_width + 4
+    grid_right = x + width - 52
+    grid_bottom = y + axis_size + 8 + date_width * 0.71 + 6
+    grid_top = y + height - title_size - 10
+    cell_width = (grid_right - grid_left) / max(len(dates), 1)
+    cell_height = (grid_top - grid_bottom) / max(len(words), 1)
+    annotation_size = min(5.5, cell_height * 0.7, cell_width / 5)
+
+    pdf.setStrokeColor(colors.toColor(LIGHTGREY))
+    pdf.setLineWidth(0.5)
+    for column, date in enumerate(dates):
+        cell_x = grid_left + column * cell_width
+        for row, word in enumerate(words):
+            grades = data[date].get(word)
+            cell_y = grid_top - (row + 1) * cell_height
+            if grades is None:
+                pdf.rect(cell_x, cell_y, cell_width, cell_height, stroke=1, fill=0)
+                continue
+            fill = _mix(wrong, correct, min(max(grades[3] / 100, 0), 1))
+            pdf.setFillColor(fill)
+            pdf.rect(cell_x, cell_y, cell_width, cell_height, stroke=1, fill=1)
+            if _relative_luminance(fill) > 0.408:
+                pdf.setFillGray(0.15)
+            else:
+                pdf.setFillColor(colors.white)
+            _draw_annotation(
+                pdf,
+                cell_x + cell_width / 2,
+                cell_y + cell_height / 2,
+                grades[0],
+                grades[1],
+                annotation_size,
+                font_name,
+            )
+
+    # Tick labels, skipping rows when they would overlap like seaborn does
+    pdf.setFillColor(colors.black)
+    pdf.setFont(font_name, tick_size)
+    row_step = max(int(tick_size // cell_height) + 1, 1) if words else 1
+    for row in range(0, len(words), row_step):
+        pdf.drawRightString(
+            grid_left - 4,
+            grid_top - (row + 0.5) * cell_height - tick_size * 0.35,
+            words[row],
+        )
+    column_step = -(-len(dates) // MAX_LABELLED_BARS)
+    for column, date in list(enumerate(dates))[::column_step]:
+        pdf.saveState()
+        pdf.translate(grid_left + (column + 0.5) * cell_width, grid_bottom - 3)
+        pdf.rotate(45)
+        pdf.drawRightString(0, -tick_size * 0.35, date)
+        pdf.restoreState()
+
+    pdf.setFont(font_name, axis_size)
+    pdf.drawCentredString((grid_left + grid_right) / 2, y + 2, xlabel)
+    pdf.saveState()
+    pdf.translate(x + axis_size, (grid_bottom + grid_top) / 2)
+    pdf.rotate(90)
+    pdf.drawCentredString(0, 0, "Words")
+    pdf.restoreState()
+
+    # Colour scale
+    bar_x, bar_width = grid_right + 10, 7
+    draw_colour_scale(pdf, (wrong, correct), bar_x, grid_bottom, bar_width, grid_top - grid_bottom)
+    pdf.setStrokeColor(colors.black)
+    pdf.setFont(font_name, tick_size - 1)
+    for tick in range(0, 101, 20):
+        tick_y = grid_bottom + (grid_top - grid_bottom) * tick / 100
+        pdf.line(bar_x + bar_width, tick_y, bar_x + bar_width + 2, tick_y)
+        pdf.drawString(bar_x + bar_width + 3, tick_y - (tick_size - 1) * 0.35, str(tick))
+    pdf.saveState()
+    pdf.translate(bar_x + bar_width + 24, (grid_bottom + grid_top) / 2)
+    pdf.rotate(90)
+    pdf.drawCentredString(0, 0, "Correct Percentage (0-100)%")
+    pdf.restoreState()
+    pdf.restoreState()
@@ -1,6 +1,13 @@
-import matplotlib.pyplot as plt
-from utils.user_dates import generate_date_array, get_from_date
+from utils.instrumentation import traced
+from utils.user_dates import (
+    bucket_label,
+    generate_bucket_array,
+    get_from_date,
+    window_label,
+)
+import io
 import os
+from functools import lru_cache
 
 TEAL = "#76E1B5"
 PURPLE = "#779BF5"
@@ -9,6 +16,8 @@ GREEN2 = "#B6D360"
 RED = "#EB503D"
 WRONG_COLOUR = "coral"
 CORRECT_COLOUR = TEAL
+# Longer bar charts only label every few bars with their date
+MAX_LABELLED_BARS = 26
 
 
 title_font = {
@@ -50,15 +59,28 @@ def set_tick_font(ax, fontdict):
         label.set_family(fontdict.get("family", "sans-serif"))
 
 
-def build_stacks(active_dates: object, from_today: bool):
+def build_stacks(active_dates: object, from_today: bool, window=14, bucket="day"):
+    """
+    Collects the words correct and incorrect of the window most recent buckets,
+    from stats keyed by bucket start date: the DayCounts of UserStats.get_bucket_stats,
+    or dicts in the format of daily_stat_template.
+    """
     words_correct, words_incorrect = [], []
-    date_list = generate_date_array(
-        get_from_date(active_dates.keys(), from_today=from_today)
+    date_list = generate_bucket_array(
+        get_from_date(active_dates.keys(), from_today=from_today),
+        num_buckets=window,
+        bucket=bucket,
     )
     for date in date_list:
-        date_data = active_dates.get(date, {"words_correct": 0, "words_incorrect": 0})
-        words_correct.append(date_data["words_correct"])
-        words_incorrect.append(date_data["words_incorrect"])
+        date_data = active_dates.get(date)
+        if date_data is None:
+            correct, incorrect = 0, 0
+        elif isinstance(date_data, dict):
+            correct, incorrect = date_data["words_correct"], date_data["words_incorrect"]
+        else:
+            correct, incorrect = date_data.correct, date_data.incorrect
+        words_correct.append(correct)
+        words_incorrect.append(incorrect)
     return date_list, words_correct, words_incorrect
 
 
@@ -78,84 +100,172 @@ def get_words_pc(words_correct, words_incorrect):
     return words_correct_percentage, words_incorrect_percentage
 
 
-def format_date_list_for_plotting(date_list):
-    formatted_date_list = []
-    for date in date_list:
-        day, month, year = date.split("-")
-        formatted_date_list.append(f"{day}/{month}/{year[2:4]}")
-    return formatted_date_list
+def plot_percentage_of_words_accuracy_bar_chart(
+    active_dates, from_today=True, window=14, bucket="day"
+):
+    """
+    Plots a stacked bar chart of the percentages of words correct and incorrect
+    over the last window buckets.
 
+    Args:
+    active_dates (dict): Word counts by date, as returned by get_daily_stats.
+    from_today (bool): Whether the window ends today or at the most recent activity.
+    window (int): Number of bars.
+    bucket (str): "day", "week" or "month".
 
-def plot_percentage_of_words_accuracy_bar_chart(active_dates, from_today=True):
+    Returns:
+    matplotlib.figure.Figure: A new figure, not shared with the reports.
     """
-    Plots a stacked bar chart of words correct and incorrect percentages over given dates.
+    return AccuracyBarChart(window, bucket).update(active_dates, from_today=from_today)
 
-    Args:
-    date_list (list): List of date strings.
-    words_correct_percentage (list): List of correct word percentages.
-    words_in
+
+class FigureTemplate:
     """
-    date_list, words_correct, words_incorrect = build_stacks(
-        active_dates, from_today=from_today
-    )
-    words_correct_percentage, words_incorrect_percentage = get_words_pc(
-        words_correct, words_incorrect
-    )
+    A figure whose fixed parts (axes, titles, fonts, legends, colour bars) are
+    built once and whose data artists are updated for each report. It is not
+    drawn through pyplot, so closing it after saving is a no-op and the same
+    figure is returned by every update.
 
-    fig, ax = plt.subplots(figsize=(15, 5))
+    tight_layout is only rerun when the tick labels of an update are wider than
+    the ones the layout was last computed for, so a figure can keep slightly
+    wider margins than a freshly built one would have.
+    """
+
+    def __init__(self, figsize=(15, 5)):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.fig = Figure(figsize=figsize)
+        FigureCanvasAgg(self.fig)
+        self._label_widths = None
+        self._subplotpars = None
+
+    def _label_width(self, labels, axis):
+        ticks = axis.get_ticklabels()
+        if not labels or not ticks:
+            return 0.0
+        renderer = self.fig.canvas.get_renderer()
+        prop = ticks[0].get_fontproperties()
+        return max(
+            renderer.get_text_width_height_descent(str(label), prop, ismath=False)[0]
+            for label in labels
+        )
+
+    def set_tick_labels(self, ax, xlabels, ylabels=None):
+        """
+        Sets the x (and y) tick label texts, keeping their fonts and rotation,
+        and redoes the layout if any of them got wider.
+        """
+        from matplotlib.ticker import FixedFormatter
+
+        ax.xaxis.set_major_formatter(FixedFormatter(xlabels))
+        widths = [self._label_width(xlabels, ax.xaxis)]
+        if ylabels is not None:
+            ax.yaxis.set_major_formatter(FixedFormatter(ylabels))
+            widths.append(self._label_width(ylabels, ax.yaxis))
+        if self._label_widths is None or any(
+            width > laid_out for width, laid_out in zip(widths, self._label_widths)
+        ):
+            # Start from the figure's own subplot parameters, as a new figure would
+            if self._subplotpars is None:
+                params = self.fig.subplotpars
+                self._subplotpars = {
+                    name: getattr(params, name)
+                    for name in ("left", "right", "bottom", "top", "wspace", "hspace")
+                }
+            else:
+                self.fig.subplots_adjust(**self._subplotpars)
+            self.fig.tight_layout()
+            self._label_widths = widths
 
-    bars_correct = ax.bar(
-        date_list, words_correct_percentage, label="Words Correct", color=CORRECT_COLOUR
-    )
-    bars_incorrect = ax.bar(
-        date_list,
-        words_incorrect_percentage,
-        bottom=words_correct_percentage,
-        label="Words Incorrect",
-        color=WRONG_COLOUR,
-    )
 
-    # Add text labels on the bars for raw word counts
-    for bar, label in zip(bars_correct, words_correct):
-        height = bar.get_height()
-        if label != 0:  # Only place text if the bar is not zero
-            ax.text(
-                bar.get_x() + bar.get_width() / 2,
-                bar.get_y() + height / 2,
-                str(label),
-                ha="center",
-                va="center",
-                color="k",
-                fontdict=bar_font,
-            )
-
-    for bar, label in zip(bars_incorrect, words_incorrect):
-        height = bar.get_height()  
-        if label != 0:  
-
-            ax.text(
-                bar.get_x() + bar.get_width() / 2,
-                bar.get_y() + height / 2,
-                str(label),
-                ha="center",
-                va="center",
-                color="k",
-                fontdict=bar_font,
-            )
-    ax.set_ylim(0, 100)
-    ax.set_xlabel("Last 14 Days from Most Recent Activity", fontdict=axis_font)
-    ax.set_ylabel("Word Accuracy (%)", fontdict=axis_font)
-    ax.set_title("Percentage of Words Accuracy", fontdict=title_font, y=1.05)
-    ax.set_xticks(date_list)
-    ax.set_xticklabels(format_date_list_for_plotting(date_list), rotation=90)
-    set_tick_font(ax, tick_font)
-    ax.legend(loc="upper right", bbox_to_anchor=(0.99, 1.3), prop=legend_font)
-    plt.subplots_adjust(bottom=0.2)
-    fig.autofmt_xdate()
-    plt.tight_layout()
-    return fig
+class AccuracyBarChart(FigureTemplate):
+    """
+    Figure template of plot_percentage_of_words_accuracy_bar_chart for a window
+    of a fixed number of day, week or month buckets. Windows longer than
+    MAX_LABELLED_BARS get smaller count labels and only every few bars a date.
+    """
+
+    def __init__(self, window=14, bucket="day"):
+        super().__init__(figsize=(15, 5))
+        self.window = window
+        self.bucket = bucket
+        fig = self.fig
+        ax = self.ax = fig.subplots()
+        positions = range(window)
+        zeros = [0] * window
+        self.tick_step = -(-window // MAX_LABELLED_BARS)
+        font = bar_font
+        if window > 14:
+            font = dict(bar_font, fontsize=max(6, bar_font["fontsize"] * 14 / window))
+        self.bars_correct = ax.bar(
+            positions, zeros, label="Words Correct", color=CORRECT_COLOUR
+        )
+        self.bars_incorrect = ax.bar(
+            positions, zeros, bottom=zeros, label="Words Incorrect", color=WRONG_COLOUR
+        )
+        # One, initially hidden, count label per bar
+        self.labels_correct, self.labels_incorrect = [
+            [
+                ax.text(0, 0, "", ha="center", va="center", color="k", fontdict=font, visible=False)
+                for _ in positions
+            ]
+            for _ in range(2)
+        ]
+        ax.set_ylim(0, 100)
+        ax.set_xlabel(window_label(window, bucket), fontdict=axis_font)
+        ax.set_ylabel("Word Accuracy (%)", fontdict=axis_font)
+        ax.set_title("Percentage of Words Accuracy", fontdict=title_font, y=1.05)
+        ax.set_xticks(positions[::self.tick_step])
+        ax.set_xticklabels([""] * len(positions[::self.tick_step]), rotation=90)
+        set_tick_font(ax, tick_font)
+        ax.legend(loc="upper right", bbox_to_anchor=(0.99, 1.3), prop=legend_font)
+        fig.subplots_adjust(bottom=0.2)
+        fig.autofmt_xdate()
+
+    def update(self, active_dates, from_today=True):
+        date_list, words_correct, words_incorrect = build_stacks(
+            active_dates, from_today=from_today, window=self.window, bucket=self.bucket
+        )
+        words_correct_percentage, words_incorrect_percentage = get_words_pc(
+            words_correct, words_incorrect
+        )
+        for bar_correct, bar_incorrect, correct_pc, incorrect_pc in zip(
+            self.bars_correct,
+            self.bars_incorrect,
+            words_correct_percentage,
+            words_incorrect_percentage,
+        ):
+            bar_correct.set_height(correct_pc)
+            bar_incorrect.set_y(correct_pc)
+            bar_incorrect.set_height(incorrect_pc)
+
+        for bars, texts, labels in (
+            (self.bars_correct, self.labels_correct, words_correct),
+            (self.bars_incorrect, self.labels_incorrect, words_incorrect),
+        ):
+            for bar, text, label in zip(bars, texts, labels):
+                text.set_visible(label != 0)
+                text.set_text(str(label))
+                text.set_position(
+                    (bar.get_x() + bar.get_width() / 2, bar.get_y() + bar.get_height() / 2)
+                )
+        self.set_tick_labels(
+            self.ax,
+            [bucket_label(date, self.bucket) for date in date_list[::self.tick_step]],
+        )
+        return self.fig
 
 
+@lru_cache(maxsize=None)
+def accuracy_bar_chart_template(window=14, bucket="day"):
+    """
+    The per process AccuracyBarChart for the window, built on first use.
+    """
+    return AccuracyBarChart(window, bucket)
+
+
+@traced("save_png")
 def save_png(fig, save_path):
     """
     Saves a matplotlib figure as a PNG file.
@@ -167,6 +277,7 @@ def save_png(fig, save_path):
     Returns:
         str: The file path of the saved PNG image.
     """
+    import matplotlib.pyplot as plt
 
     os.makedirs(os.path.dirname(save_path), exist_ok=True)
     fig.savefig(save_path, format="png")
@@ -175,6 +286,27 @@ def save_png(fig, save_path):
     return save_path
 
 
+@traced("save_png")
+def png_buffer(fig):
+    """
+    Renders a matplotlib figure to PNG in memory, so it can be handed straight
+    to the pdf without touching the filesystem.
+
+    Args:
+        fig (matplotlib.figure.Figure): The figure to render.
+
+    Returns:
+        io.BytesIO: The PNG image data, rewound to the start.
+    """
+    import matplotlib.pyplot as plt
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    plt.close(fig)
+    buf.seek(0)
+    return buf
+
+
 if __name__ == "__main__":
     dates = {
         "01-11-2023": {"words_correct": 2, "words_incorrect": 8},
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from utils import plotting, table_builder
+
+# Bump when a code change alters the rendered output for the same inputs
+RENDER_CACHE_VERSION = 1
+
+
+def chart_style():
+    """
+    The style constants of utils/plotting.py and utils/table_builder.py, which
+    affect every rendered chart and so are part of every cache key.
+    """
+    return {
+        "colours": [
+            plotting.CORRECT_COLOUR,
+            plotting.WRONG_COLOUR,
+            table_builder.LIGHTGREY,
+        ],
+        "fonts": [
+            plotting.title_font,
+            plotting.axis_font,
+            plotting.legend_font,
+            plotting.bar_font,
+            plotting.tick_font,
+        ],
+    }
+
+
+class RenderCache:
+    """
+    On-disk, content addressed cache for rendered charts and finished reports.
+
+    Entries are keyed by a hash of the inputs that affect them, so an unchanged
+    report is reused and a changed one simply misses. The least recently used
+    entries are evicted once the cache grows past max_bytes.
+
+    :param directory: Directory holding the cache entries, created if missing.
+    :param max_bytes: Maximum total size of the entries.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(kind, *inputs):
+        """
+        Builds the cache key of an artifact of the given kind from its inputs,
+        which must be JSON serialisable.
+        """
+        payload = json.dumps(
+            [RENDER_CACHE_VERSION, kind, chart_style(), inputs],
+            sort_keys=True,
+            default=str,
+        )
+        return f"{kind}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """
+        Returns the cached bytes for key, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # Refresh the entry's mtime, which orders the LRU eviction
+        os.utime(path)
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """
+        Stores data under key, then evicts the least recently used entries if
+        the cache is over its size limit.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def get_or_render(self, key, render):
+        """
+        Returns the cached bytes for key, calling render() to produce and store them on a miss.
+        """
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.is_file() and not entry.name.startswith(".tmp-"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
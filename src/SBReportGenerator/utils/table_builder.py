@@ -1,8 +1,8 @@
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
+from functools import lru_cache
+from utils.user_dates import window_label
 from utils.plotting import (
+    MAX_LABELLED_BARS,
+    FigureTemplate,
     axis_font,
     title_font,
     set_tick_font,
@@ -15,6 +15,16 @@ from utils.plotting import (
 LIGHTGREY = "#F0F0F0"
 
 
+@lru_cache(maxsize=None)
+def word_table_cmap():
+    """
+    The wrong to correct colour map of the word table, built once per process.
+    """
+    import matplotlib.colors as mcolors
+
+    return mcolors.LinearSegmentedColormap.from_list("", [WRONG_COLOUR, CORRECT_COLOUR])
+
+
 # Function to format annotations
 def format_annotation(val):
     if isinstance(val, tuple):
@@ -22,7 +32,12 @@ def format_annotation(val):
     return str(val)
 
 
-def make_word_table(data):
+def make_word_table(data, xlabel=window_label()):
+    # pandas, seaborn and matplotlib are slow to import, only load them when a table is drawn
+    import pandas as pd
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
     # Define annotation function
     def format_annotation(val):
         if isinstance(val, tuple):
@@ -41,8 +56,7 @@ def make_word_table(data):
     )
     annot = df_raw.apply(lambda col: col.apply(format_annotation))
 
-    # Color map creation
-    cmap = mcolors.LinearSegmentedColormap.from_list("", [WRONG_COLOUR, CORRECT_COLOUR])
+    cmap = word_table_cmap()
 
     # Create a figure and a set of subplots
     # fig, ax = plt.subplots(figsize=(12, len(df_intensity) * 0.5))
@@ -68,7 +82,7 @@ def make_word_table(data):
     set_tick_font(ax, tick_font)
 
     plt.title("Accuracy by Word", fontdict=title_font, y=1.05)
-    plt.xlabel("Last 14 Days from Most Recent Activity", fontdict=axis_font)
+    plt.xlabel(xlabel, fontdict=axis_font)
     plt.ylabel("Words", fontdict=axis_font)
     plt.subplots_adjust(bottom=0.2)
     plt.yticks(rotation=0)  # This will make the y-axis labels horizontal
@@ -77,6 +91,123 @@ def make_word_table(data):
     return fig
 
 
+def word_table_frames(data):
+    """
+    Splits the word table data into the frames make_word_table plots: the
+    accuracy of each (word, day) cell and its "correct✔ incorrect✘" annotation.
+    """
+    import pandas as pd
+
+    df_raw = pd.DataFrame(data)
+    df_intensity = df_raw.apply(
+        lambda col: col.apply(lambda x: x[3] if isinstance(x, tuple) else x)
+    )
+    annot = df_raw.apply(lambda col: col.apply(format_annotation))
+    return df_intensity, annot
+
+
+class WordTable(FigureTemplate):
+    """
+    Figure template of make_word_table for a table of num_words x num_days
+    cells. Only the cell colours, the annotations and the tick labels are
+    updated per report. Tables with more than 14 columns get smaller annotations.
+    """
+
+    def __init__(self, num_words, num_days=14, xlabel=window_label()):
+        import numpy as np
+        import pandas as pd
+        import seaborn as sns
+
+        super().__init__(figsize=(15, 5))
+        self.shape = (num_words, num_days)
+        ax = self.ax = self.fig.subplots()
+        placeholder = pd.DataFrame(
+            np.zeros(self.shape), index=[""] * num_words, columns=[""] * num_days
+        )
+        sns.heatmap(
+            placeholder,
+            cmap=word_table_cmap(),
+            vmin=0,
+            vmax=100,
+            linewidths=0.5,
+            linecolor=LIGHTGREY,
+            ax=ax,
+        )
+        self.mesh = ax.collections[0]
+        self.mesh.colorbar.set_label("Correct Percentage (0-100)%", size=12)
+        if num_days > MAX_LABELLED_BARS:
+            # Like the bar chart, only label every few columns of long windows
+            ax.set_xticks([column + 0.5 for column in range(0, num_days, -(-num_days // MAX_LABELLED_BARS))])
+        # The rows and columns seaborn chose to label, which only depend on the shape
+        self.row_ticks = [int(tick) for tick in ax.get_yticks()]
+        self.column_ticks = [int(tick) for tick in ax.get_xticks()]
+        # One annotation per cell, in the order seaborn adds them
+        fontsize = 11 if num_days <= 14 else max(4, 11 * 14 / num_days)
+        self.annotations = [
+            ax.text(column + 0.5, row + 0.5, "", ha="center", va="center", fontsize=fontsize)
+            for row in range(num_words)
+            for column in range(num_days)
+        ]
+
+        for label in ax.get_xticklabels():
+            label.set_rotation(45)
+        set_tick_font(ax, tick_font)
+        ax.set_title("Accuracy by Word", fontdict=title_font, y=1.05)
+        ax.set_xlabel(xlabel, fontdict=axis_font)
+        ax.set_ylabel("Words", fontdict=axis_font)
+        self.fig.subplots_adjust(bottom=0.2)
+        for label in ax.get_yticklabels():
+            label.set_rotation(0)
+
+    def update(self, data):
+        import numpy as np
+        from seaborn.utils import relative_luminance
+
+        df_intensity, annot = word_table_frames(data)
+        if df_intensity.shape != self.shape:
+            raise ValueError(f"Expected a {self.shape} table, got {df_intensity.shape}")
+        self.mesh.set_array(np.ma.masked_invalid(df_intensity.to_numpy(dtype=float)))
+        self.mesh.update_scalarmappable()
+        for text, value, colour, annotation in zip(
+            self.annotations,
+            self.mesh.get_array().flat,
+            self.mesh.get_facecolors(),
+            annot.to_numpy().flat,
+        ):
+            # Same text colour choice as seaborn's own annotations
+            visible = value is not np.ma.masked
+            text.set_visible(visible)
+            if visible:
+                text.set_text(annotation)
+                text.set_color(".15" if relative_luminance(colour) > 0.408 else "w")
+
+        self.set_tick_labels(
+            self.ax,
+            [str(df_intensity.columns[i]) for i in self.column_ticks],
+            [str(df_intensity.index[i]) for i in self.row_ticks],
+        )
+        return self.fig
+
+
+@lru_cache(maxsize=16)
+def word_table_template(num_words, num_days=14, xlabel=window_label()):
+    """
+    The per process WordTable of the given shape and axis title, built on first use.
+    """
+    return WordTable(num_words, num_days, xlabel)
+
+
+def render_word_table(data, xlabel=window_label()):
+    """
+    Draws the word table on the template of its shape, falling back to a new
+    figure from make_word_table for a table without words.
+    """
+    num_words = len(set().union(*data.values()))
+    if not num_words:
+        return make_word_table(data, xlabel)
+    return word_table_template(num_words, len(data), xlabel).update(data)
+
+
 if __name__ == "__main__":
 
     data = {
@@ -1,8 +1,83 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 TODAY_STR = datetime.today().strftime("%d-%m-%y")
 TODAY_DATETIME = datetime.today().date()
 
+DATE_FORMAT = "%d-%m-%Y"
+# Date formats seen in user_productions files, the app's current one first
+DATE_FORMATS = ["%d-%m-%Y", "%d/%m/%Y", "%d-%m-%y", "%d/%m/%y"]
+# Distinct date strings a DateParser keeps, over ten years of days in one format
+DATE_CACHE_SIZE = 4096
+
+
+class DateParser:
+    """
+    Parses date strings from the user_productions logs into date objects.
+
+    Every distinct string is only parsed once, and the format that matched last
+    is tried first, so a file (or a run of rows) written in one format costs a
+    single strptime per distinct date instead of up to four per row.
+
+    At most maxsize dates are kept, the oldest added is dropped first, as logs
+    are written in time order. Strings that fail to parse are not kept, so
+    malformed input does not stay in memory.
+    """
+
+    def __init__(self, formats=DATE_FORMATS, maxsize=DATE_CACHE_SIZE):
+        self.formats = list(formats)
+        self.format = self.formats[0]
+        self.maxsize = maxsize
+        self._cache = {}
+
+    def parse(self, date_str):
+        """
+        Returns the datetime.date for date_str, or None if no known format matches.
+        """
+        date = self._cache.get(date_str)
+        if date is None:
+            date = self._parse(date_str)
+            if date is not None:
+                if len(self._cache) >= self.maxsize:
+                    del self._cache[next(iter(self._cache))]
+                self._cache[date_str] = date
+        return date
+
+    def _parse(self, date_str):
+        try:
+            return datetime.strptime(date_str, self.format).date()
+        except ValueError:
+            pass
+        for fmt in self.formats:
+            if fmt == self.format:
+                continue
+            try:
+                date = datetime.strptime(date_str, fmt).date()
+            except ValueError:
+                continue
+            self.format = fmt
+            return date
+        return None
+
+
+_date_parser = DateParser()
+
+
+def parse_date(date_str):
+    """
+    Parses a date string in any of the known formats into a datetime.date,
+    with memoization. Returns None if the string matches no format.
+    """
+    return _date_parser.parse(date_str)
+
+
+def date_to_str(date):
+    """
+    Formats a date as 'dd-mm-yyyy'. Intended for display and dict keys only,
+    dates are kept as date objects everywhere else.
+    """
+    return f"{date.day:02d}-{date.month:02d}-{date.year:04d}"
+
 
 def generate_date_array(from_date, num_days=14):
     """
@@ -15,18 +90,81 @@ def generate_date_array(from_date, num_days=14):
     Returns:
     list: A list of date strings in 'DD-MM-YYYY' format.
     """
-    # Parse the string to a datetime object
-    date_format = "%d-%m-%Y"
-    date = datetime.strptime(from_date, date_format)
+    date = parse_date(from_date)
+    if date is None:
+        raise ValueError(f"time data {from_date!r} does not match format '{DATE_FORMAT}'")
+    return [date_to_str(date - timedelta(days=offset)) for offset in range(num_days - 1, -1, -1)]
+
 
-    date_list = []
-    for _ in range(num_days):
-        date_list.append(date.strftime("%d-%m-%Y"))
-        date = date - timedelta(days=1)
-    date_list.reverse()
-    return date_list
+# Sizes of the periods the statistics can be aggregated into
+BUCKETS = ("day", "week", "month")
+BUCKET_LABEL_FORMATS = {"day": "%d/%m/%y", "week": "%d/%m/%y", "month": "%b %y"}
 
 
+def check_bucket(bucket):
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {BUCKETS}, got {bucket!r}")
+
+
+def bucket_start(date, bucket="day"):
+    """
+    Returns the first date of the bucket (the day itself, its week starting on
+    Monday, or its month) a datetime.date falls in.
+    """
+    if bucket == "week":
+        return date - timedelta(days=date.weekday())
+    if bucket == "month":
+        return date.replace(day=1)
+    return date
+
+
+def generate_bucket_array(from_date, num_buckets=14, bucket="day"):
+    """
+    Generates the start dates of the num_buckets consecutive buckets ending with
+    the one that holds from_date, the bucket equivalent of generate_date_array.
+
+    Parameters:
+    from_date (str): The most recent date, in 'DD-MM-YYYY' format.
+    num_buckets (int): Number of buckets (days, weeks or months) to generate.
+    bucket (str): "day", "week" or "month".
+
+    Returns:
+    list: Bucket start date strings in 'DD-MM-YYYY' format, oldest first.
+    """
+    check_bucket(bucket)
+    if bucket == "day":
+        return generate_date_array(from_date, num_days=num_buckets)
+    date = parse_date(from_date)
+    if date is None:
+        raise ValueError(f"time data {from_date!r} does not match format '{DATE_FORMAT}'")
+    last = bucket_start(date, bucket)
+    if bucket == "week":
+        starts = [last - timedelta(weeks=offset) for offset in range(num_buckets - 1, -1, -1)]
+    else:
+        month_index = last.year * 12 + last.month - 1
+        starts = [
+            last.replace(year=index // 12, month=index % 12 + 1)
+            for index in range(month_index - num_buckets + 1, month_index + 1)
+        ]
+    return [date_to_str(start) for start in starts]
+
+
+def bucket_label(date_str, bucket="day"):
+    """
+    Formats a bucket start date for chart labels: 'dd/mm/yy' for days and weeks, 'Mon yy' for months.
+    """
+    return parse_date(date_str).strftime(BUCKET_LABEL_FORMATS[bucket])
+
+
+def window_label(num_buckets=14, bucket="day"):
+    """
+    The axis title of a chart covering num_buckets buckets, e.g. "Last 14 Days from Most Recent Activity".
+    """
+    unit = bucket.capitalize() + ("s" if num_buckets != 1 else "")
+    return f"Last {num_buckets} {unit} from Most Recent Activity"
+
+
+@lru_cache(maxsize=4096)
 def format_date(date_str):
     """
     Parses a date string in various formats and converts it to 'dd-mm-yyyy', adding leading zeros where necessary.
@@ -37,20 +175,10 @@ def format_date(date_str):
     Returns:
     str: The formatted date string in 'dd-mm-yyyy' format, or an error message if parsing fails.
     """
-    # Define possible date formats
-    date_formats = ["%d-%m-%Y", "%d/%m/%Y", "%d-%m-%y", "%d/%m/%y"]
-
-    for fmt in date_formats:
-        try:
-            # Try to parse the date with the current format
-            parsed_date = datetime.strptime(date_str, fmt)
-            # Return the date in 'dd-mm-yyyy' format
-            return parsed_date.strftime("%d-%m-%Y")
-        except ValueError:
-            # If parsing fails, try the next format
-            continue
-
-    return "Invalid date format"
+    date = parse_date(date_str)
+    if date is None:
+        return "Invalid date format"
+    return date_to_str(date)
 
 
 def format_dates(dates):
@@ -65,38 +193,30 @@ def get_from_date(date_list=None, from_today=False):
         return datetime.today().strftime("%d-%m-%Y")
 
     # else use the most recent date in the list
-    parsed_dates = [datetime.strptime(date, "%d-%m-%Y") for date in date_list]
-    most_recent_date = max(parsed_dates)
-    return most_recent_date.strftime("%d-%m-%Y")
+    return date_to_str(max(parse_date(date) for date in date_list))
 
 
 def sort_dates(dates):
-    dates = [datetime.strptime(date, "%d-%m-%Y") for date in dates]
-    dates.sort()
-    sorted_dates = [datetime.strftime(date, "%d-%m-%Y") for date in dates]
-    return sorted_dates
+    return [date_to_str(date) for date in sorted(parse_date(date) for date in dates)]
 
 
+@lru_cache(maxsize=4096)
 def get_day_name(date):
     # Assuming the input date format is 'dd-mm-yyyy'
-    date_obj = datetime.strptime(date, "%d-%m-%Y")
-    day_name = date_obj.strftime("%A")
-    return day_name
+    return parse_date(date).strftime("%A")
 
 
 def get_most_recent_date(date_list):
-    formatted_dates = format_dates(date_list)
-    dates = [datetime.strptime(date_str, "%d-%m-%Y") for date_str in formatted_dates]
+    dates = [date for date in map(parse_date, date_list) if date is not None]
     if dates:
-        most_recent_date = max(dates)
-        return most_recent_date.strftime("%d-%m-%Y")
+        return date_to_str(max(dates))
     else:
         return None
 
 
 def is_today(date):
     if isinstance(date, str):
-        date = datetime.strptime(date, "%d-%m-%Y").date()
+        date = parse_date(date)
     elif isinstance(date, datetime):
         date = date.date()
     return TODAY_DATETIME == date
@@ -1,25 +1,53 @@
-import sys
-from utils.table_builder import make_word_table
-import copy
-from utils.plotting import plot_percentage_of_words_accuracy_bar_chart, save_png
+from utils.table_builder import render_word_table
+import datetime
+import io
+from functools import cached_property
+from utils.plotting import (
+    build_stacks,
+    accuracy_bar_chart_template,
+    save_png,
+    png_buffer,
+)
 from utils.user_dates import (
+    DateParser,
+    date_to_str,
     format_date,
+    parse_date,
     sort_dates,
     get_day_name,
-    generate_date_array,
     get_from_date,
+    bucket_label,
+    bucket_start,
+    check_bucket,
+    generate_bucket_array,
+    window_label,
 )
-from datetime import datetime
-from utils.pdf_maker import init_pdf, set_title, draw_ruler, set_image, set_text
-import pkg_resources
+from utils.instrumentation import span
+from utils.word_index import WordIndex
+from importlib.resources import files
 
-DATA_PATH = pkg_resources.resource_filename("SBReportGenerator", "images")
+DATA_PATH = str(files("SBReportGenerator").joinpath("images"))
 
 
 CORRECT = "1"
 INCORRECT = "0"
 SKIPPED = "2"
 
+CHART_FORMATS = ("png", "vector", "native")
+
+# Words per word table; longer vocabularies are split over several tables and pages
+TABLE_ROWS_PER_CHUNK = 15
+
+# Page layout of the pdf report, in points
+MARGIN_X = 40
+CONTENT_TOP = 593  # below the report header on the first page
+CONTINUED_TOP = 740  # on the following pages
+CONTENT_BOTTOM = 45  # above the disclaimer
+SECTION_GAP = 30
+BAR_CHART_WIDTH = 520
+TABLE_WIDTH = 570
+FIGURE_ASPECT = 5 / 15  # height / width of the 15x5 inch chart figures
+
 daily_stat_template = {
     "words_correct": 0,
     "words_incorrect": 0,
@@ -36,13 +64,422 @@ word_daily_stat_template = {
 }
 
 
+def split_by_uid(up_contents):
+    """
+    Partitions the lines of a combined user_productions log by uid in a single
+    pass, keeping the original line order within each user.
+
+    Parameters:
+    up_contents (iterable): Lines of a user_productions log, e.g. an open file.
+
+    Returns:
+    dict: uid -> list of that user's lines, in order of first appearance.
+    """
+    users = {}
+    for line in up_contents:
+        line = line.rstrip()
+        if not line.strip():
+            continue
+        uid = line.split(",", 1)[0].strip()
+        users.setdefault(uid, []).append(line)
+    return users
+
+
+def iter_user_productions(up_contents, date_parser=None):
+    """
+    Lazily parses user_productions lines, one at a time, skipping blank lines.
+
+    Parameters:
+    up_contents (iterable): Lines of a user_productions log, e.g. an open file.
+    date_parser (DateParser): (Optional) Parser to share between calls, a new one per call by default.
+
+    Yields:
+    tuple: (uid, word, grade, date, time) with the date as a datetime.date.
+    """
+    if date_parser is None:
+        date_parser = DateParser()
+    for line in up_contents:
+        line = line.rstrip()
+        if not line.strip():
+            continue
+        uid, word, grade, date_time = line.split(",")
+        date_str, time = date_time.split(" ")
+        date = date_parser.parse(date_str)
+        if date is None:
+            raise ValueError(f"Invalid date format: {date_str!r}")
+        yield uid.strip(), word, grade, date, time
+
+
+def check_report_options(chart_format, window, bucket):
+    """
+    Raises ValueError for an unknown chart_format or bucket, or a window that is
+    not a positive number of buckets.
+    """
+    if chart_format not in CHART_FORMATS:
+        raise ValueError(
+            f"chart_format must be one of {CHART_FORMATS}, got {chart_format!r}"
+        )
+    check_bucket(bucket)
+    if not isinstance(window, int) or window < 1:
+        raise ValueError(f"window must be a positive number of buckets, got {window!r}")
+
+
+def split_word_table(data, rows=TABLE_ROWS_PER_CHUNK):
+    """
+    Splits word table data into tables of at most rows words each, keeping the
+    words in order of first appearance and every day column in each table.
+
+    Parameters:
+    data (dict): data[dd/mm/yy][word] = (correct, incorrect, skipped, accuracy_pc), see UserStats.get_word_table_data.
+    rows (int): Maximum number of words per table.
+
+    Returns:
+    list: The data of each table, a single one holding data itself when it has at most rows words.
+    """
+    words = list(dict.fromkeys(word for day in data.values() for word in day))
+    if len(words) <= rows:
+        return [data]
+    return [
+        {
+            date: {word: day[word] for word in words[start:start + rows] if word in day}
+            for date, day in data.items()
+        }
+        for start in range(0, len(words), rows)
+    ]
+
+
+def grade_accuracy_pc(correct, graded):
+    if graded == 0:
+        return 0.0
+    return round(correct / graded, 2) * 100
+
+
+class GradeCounts:
+    """
+    Correct, incorrect and skipped counts of one (day, word) cell. Slotted, as
+    a long multi-user history holds millions of them.
+    """
+
+    __slots__ = ("correct", "incorrect", "skipped")
+
+    def __init__(self, correct=0, incorrect=0, skipped=0):
+        self.correct = correct
+        self.incorrect = incorrect
+        self.skipped = skipped
+
+    def merge(self, other):
+        """
+        Adds the counts of other to these.
+        """
+        self.correct += other.correct
+        self.incorrect += other.incorrect
+        self.skipped += other.skipped
+
+    def accuracy_pc(self):
+        return grade_accuracy_pc(self.correct, self.correct + self.incorrect)
+
+    def as_dict(self):
+        """
+        The cell in the format of word_daily_stat_template.
+        """
+        return {
+            "correct": self.correct,
+            "incorrect": self.incorrect,
+            "skipped": self.skipped,
+            "word_accuracy_pc": self.accuracy_pc(),
+        }
+
+
+class DayCounts(GradeCounts):
+    """
+    The counts of one day, in total and by word. While the day is open, see
+    DailyStatsBuilder, times holds the (word, grade) entry of each time of the
+    day, so a repeated timestamp can replace its earlier entry.
+    """
+
+    __slots__ = ("by_word", "times", "replaced")
+
+    def __init__(self, correct=0, incorrect=0, skipped=0):
+        super().__init__(correct, incorrect, skipped)
+        self.by_word = {}
+        self.times = None
+        # Whether an entry was replaced by one of another word, which may leave
+        # by_word with a word no time has any more, see words
+        self.replaced = False
+
+    def words(self):
+        """
+        The GradeCounts of each word practised on the day, in order of their
+        first time.
+        """
+        if not self.replaced:
+            return self.by_word
+        return {word: self.by_word[word] for word, _ in self.times.values()}
+
+    def close(self):
+        """
+        Drops the times of the day, once no more repeated timestamps are expected.
+        """
+        self.by_word = self.words()
+        self.times = None
+        self.replaced = False
+
+    def as_dict(self):
+        """
+        The day in the format of daily_stat_template.
+        """
+        total = self.correct + self.incorrect
+        return {
+            "words_correct": self.correct,
+            "words_incorrect": self.incorrect,
+            "words_skipped": self.skipped,
+            "words_total": total,
+            "words_accuracy_pc": grade_accuracy_pc(self.correct, total),
+            "by_word": {word: counts.as_dict() for word, counts in self.words().items()},
+        }
+
+    def to_state(self):
+        state = {
+            "counts": [self.correct, self.incorrect, self.skipped],
+            "by_word": {
+                word: [counts.correct, counts.incorrect, counts.skipped]
+                for word, counts in self.by_word.items()
+            },
+        }
+        if self.times is not None:
+            state["times"] = {time: list(entry) for time, entry in self.times.items()}
+            state["replaced"] = self.replaced
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        day = cls(*state["counts"])
+        day.by_word = {word: GradeCounts(*counts) for word, counts in state["by_word"].items()}
+        if "times" in state:
+            day.times = {time: tuple(entry) for time, entry in state["times"].items()}
+            day.replaced = state["replaced"]
+        return day
+
+
+def rollup_daily_stats(day_counts, bucket="day"):
+    """
+    Sums day counts into weekly or monthly buckets, keyed by each bucket's
+    start date. Works on the daily aggregates, so the cost grows with the
+    number of active days and words rather than log rows.
+
+    Parameters:
+    day_counts (dict): DayCounts keyed by 'dd-mm-yyyy' date, as UserStats.day_counts.
+    bucket (str): "day", "week" or "month". day_counts is returned as is for "day".
+
+    Returns:
+    dict: The DayCounts of every bucket with activity, oldest first.
+    """
+    check_bucket(bucket)
+    if bucket == "day":
+        return day_counts
+    buckets = {}
+    for day in sort_dates(day_counts):
+        counts = day_counts[day]
+        key = date_to_str(bucket_start(parse_date(day), bucket))
+        bucket_counts = buckets.get(key)
+        if bucket_counts is None:
+            bucket_counts = buckets[key] = DayCounts()
+        bucket_counts.merge(counts)
+        for word, word_counts in counts.words().items():
+            total = bucket_counts.by_word.get(word)
+            if total is None:
+                total = bucket_counts.by_word[word] = GradeCounts()
+            total.merge(word_counts)
+    return buckets
+
+
+class DailyStatsBuilder:
+    """
+    Builds daily_stats incrementally from parsed user_productions rows, so a log
+    can be aggregated while it is streamed. Memory grows with the number of
+    distinct (day, word) cells, not with the number of rows.
+
+    A row repeating the timestamp of an earlier row of the same day replaces
+    that row, like ColumnarUserStats does. As the app
+    appends in time order, the times are only kept for the OPEN_DAYS days most
+    recently started in the log: a repeated timestamp on a day that is already
+    closed is counted twice.
+    """
+
+    # Days whose times are kept, e.g. the current one and the one before for a
+    # session played across midnight
+    OPEN_DAYS = 2
+
+    def __init__(self):
+        self.uids = set()
+        self.rows = 0
+        self.error = None
+        # DayCounts keyed by datetime.date, the 'dd-mm-yyyy' dict view is only made in get_daily_stats
+        self.days = {}
+        # The open days, oldest first
+        self._open = []
+        # One shared tuple per (word, grade)
+        self._entries = {}
+
+    def add(self, uid, word, grade, date, time):
+        self.uids.add(uid)
+        self.rows += 1
+        day = self.days.get(date)
+        if day is None:
+            day = self.days[date] = DayCounts()
+            day.times = {}
+            self._open.append(date)
+            if len(self._open) > self.OPEN_DAYS:
+                self.days[self._open.pop(0)].close()
+        elif day.times is None:
+            self._count(day, word, grade, step=1)
+            return
+        entry = (word, grade)
+        entry = self._entries.setdefault(entry, entry)
+        previous = day.times.get(time)
+        if previous is not None:
+            self._count(day, *previous, step=-1)
+            if previous[0] != word:
+                day.replaced = True
+        day.times[time] = entry
+        self._count(day, word, grade, step=1)
+
+    def _count(self, day, word, grade, step):
+        word_counts = day.by_word.get(word)
+        if word_counts is None:
+            word_counts = day.by_word[word] = GradeCounts()
+        if grade == CORRECT:
+            day.correct += step
+            word_counts.correct += step
+        elif grade == INCORRECT:
+            day.incorrect += step
+            word_counts.incorrect += step
+        elif grade == SKIPPED:
+            day.skipped += step
+            word_counts.skipped += step
+
+    def update(self, up_contents, date_parser=None):
+        for row in iter_user_productions(up_contents, date_parser=date_parser):
+            self.add(*row)
+        return self
+
+    def to_state(self):
+        """
+        Returns the aggregation state as JSON serialisable data, see from_state.
+        Only the open days carry their times.
+        """
+        return {
+            "uids": sorted(self.uids),
+            "rows": self.rows,
+            "days": {date.isoformat(): day.to_state() for date, day in self.days.items()},
+            "open": [date.isoformat() for date in self._open],
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Restores a builder saved with to_state, so more rows can be added to it.
+        """
+        builder = cls()
+        builder.uids = set(state["uids"])
+        builder.rows = state["rows"]
+        builder.days = {
+            datetime.date.fromisoformat(day): DayCounts.from_state(counts)
+            for day, counts in state["days"].items()
+        }
+        builder._open = [datetime.date.fromisoformat(day) for day in state["open"]]
+        for date in builder._open:
+            day = builder.days[date]
+            day.times = {
+                time: builder._entries.setdefault(entry, entry) for time, entry in day.times.items()
+            }
+        return builder
+
+    def get_uid(self):
+        if len(self.uids) != 1:
+            raise ValueError(f"Expected exactly one UID, found: {sorted(self.uids)}")
+        return next(iter(self.uids))
+
+    def get_daily_stats(self):
+        """
+        Returns the aggregated daily_stats, in the dict format of
+        daily_stat_template, with the totals and accuracy percentages filled in.
+        """
+        return {date_to_str(date): day.as_dict() for date, day in self.days.items()}
+
+
+def aggregate_by_uid(up_contents):
+    """
+    Aggregates a combined user_productions log per uid in a single streaming pass.
+    A malformed line is recorded as the error of the user it belongs to.
+
+    Parameters:
+    up_contents (iterable): Lines of a user_productions log, e.g. an open file.
+
+    Returns:
+    dict: uid -> DailyStatsBuilder, in order of first appearance.
+    """
+    users = {}
+    date_parser = DateParser()
+    for line in up_contents:
+        if not line.strip():
+            continue
+        uid = line.split(",", 1)[0].strip()
+        builder = users.get(uid)
+        if builder is None:
+            builder = users[uid] = DailyStatsBuilder()
+        try:
+            builder.update((line,), date_parser=date_parser)
+        except ValueError as e:
+            builder.rows += 1
+            if builder.error is None:
+                builder.error = f"{e} in line {line.rstrip()!r}"
+    return users
+
+
 class UserStats:
+    """
+    The statistics of one user's log. The counts are kept as the DayCounts of
+    a DailyStatsBuilder, day_counts, which the charts and tables read;
+    daily_stats, the dict view of them, is only built when first accessed.
+
+    A row repeating the timestamp of an earlier row replaces it, see
+    DailyStatsBuilder.
+    """
+
     def __init__(self, up_contents):
-        self.up_contents = [element for element in up_contents if element.strip()]
-        self.uid = self.get_uid()
-        self.daily_data = self.get_daily_data()
-        self.daily_stats = self.init_daily_stats()
-        self.get_daily_stats()
+        self._init_from_builder(DailyStatsBuilder().update(up_contents))
+
+    @classmethod
+    def from_builder(cls, builder):
+        """
+        Creates UserStats from already aggregated rows, sharing the builder's
+        DayCounts. The raw per entry daily_data is not kept.
+        """
+        stats = cls.__new__(cls)
+        stats._init_from_builder(builder)
+        return stats
+
+    def _init_from_builder(self, builder):
+        self.up_contents = None
+        self.daily_data = None
+        self.uid = builder.get_uid()
+        self.day_counts = {date_to_str(date): day for date, day in builder.days.items()}
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Streams a user_productions.txt file, aggregating it line by line.
+        """
+        with open(path, "r") as file:
+            return cls.from_builder(DailyStatsBuilder().update(file))
+
+    @cached_property
+    def daily_stats(self):
+        """
+        The stats in the dict format of daily_stat_template, keyed by 'dd-mm-yyyy' date.
+        """
+        return {day: counts.as_dict() for day, counts in self.day_counts.items()}
 
     def get_uid(self):
         """
@@ -50,76 +487,7 @@ class UserStats:
         logs. Every line of the log contains the uid. If more than one is detected
         then something has gone wrong when the user_productions was made.
         """
-        uid = set()
-        for line in self.up_contents:
-            if line:
-                uid.add(line.split(",")[0].strip())
-        if len(uid) != 1:
-            print("ERROR: Multiple UIDs found:", list(uid), file=sys.stderr)
-            sys.exit(1)
-        return list(uid)[0]
-
-    def get_daily_data(self):
-        """
-        Create an object of the user_productions content based on date and then time.
-        Format: obj[date][time] = (word, grade)
-        """
-        daily_data = {}
-        for line in self.up_contents:
-            _, word, grade, date_time = line.split(",")
-            date, time = date_time.split(" ")
-            date = format_date(date)
-            if date not in daily_data:
-                daily_data[date] = {}
-            daily_data[date][time] = (word, grade)
-        return daily_data
-
-    def init_daily_stats(self):
-        daily_stats = {}
-        for day in self.daily_data.keys():
-            if day not in daily_stats.keys():
-                daily_stats[day] = copy.deepcopy(daily_stat_template)
-
-        return daily_stats
-
-    def get_daily_stats(self):
-        for day in self.get_ordered_dates():
-            self.get_daily_word_stats(day)
-
-    def get_daily_word_stats(self, day):
-        total, total_correct, total_incorrect, total_skipped = 0, 0, 0, 0
-
-        for _, (word, grade) in self.daily_data[day].items():
-            if word not in self.daily_stats[day]["by_word"].keys():
-                self.daily_stats[day]["by_word"][word] = copy.deepcopy(
-                    word_daily_stat_template
-                )
-            if grade == CORRECT:
-                total_correct += 1
-                total += 1
-                self.daily_stats[day]["by_word"][word]["correct"] += 1
-            elif grade == INCORRECT:
-                total_incorrect += 1
-                total += 1
-                self.daily_stats[day]["by_word"][word]["incorrect"] += 1
-            elif grade == SKIPPED:
-                total_skipped += 1
-                self.daily_stats[day]["by_word"][word]["skipped"] += 1
-
-        self.daily_stats[day]["words_correct"] = total_correct
-        self.daily_stats[day]["words_incorrect"] = total_incorrect
-        self.daily_stats[day]["words_skipped"] = total_skipped
-        self.daily_stats[day]["words_total"] = total
-        self.daily_stats[day]["words_accuracy_pc"] = (
-            round(total_correct / total, 2) * 100
-        )
-        # Get the by word pc
-        for word_stats in self.daily_stats[day]["by_word"].values():
-            correct = word_stats["correct"]
-            incorrect = word_stats["incorrect"]
-            word_stats["word_accuracy_pc"] = (
-                round(correct / (correct + incorrect), 2) * 100
-            )
+        return self.uid
 
     def get_daily_stat_str(self):
         output = f"{str(self.uid)} STATS:\n"
@@ -130,6 +498,8 @@ class UserStats:
         return output
 
     def __str__(self):
+        if self.daily_data is None:
+            return self.get_daily_stat_str()
         output = f"{str(self.uid)} DATA:\n"
         for date, date_info in self.daily_data.items():
             output += f"{date}\n"
@@ -138,18 +508,24 @@ class UserStats:
         return output
 
     def get_ordered_dates(self, reversed=False):
-        dates = self.daily_data.keys()
+        dates = self.day_counts.keys()
         ordered_dates = sort_dates(dates)
         if reversed:
             return ordered_dates[::-1]
         return ordered_dates
 
+    def get_word_index(self):
+        """
+        Returns the WordIndex of the per word histories, built once on first use,
+        for per word history, first/last attempt and accuracy queries.
+        """
+        index = self.__dict__.get("_word_index")
+        if index is None:
+            index = self._word_index = WordIndex(self.daily_stats)
+        return index
+
     def get_all_words_list(self):
-        words = set()
-        for _, info in self.daily_data.items():
-            for _, (word, _) in info.items():
-                words.add(word)
-        return sorted(words)
+        return self.get_word_index().words()
 
     def daily_words_attempt_history(self):
         output = [("date", "word", "correct", "incorrect", "skipped")]
@@ -161,12 +537,10 @@ class UserStats:
         return output
 
     def daily_word_attempt_history(self, target_word):
-        history = self.daily_words_attempt_history()
-        word_history = []
-        for date, word, correct, incorrect, skipped in history:
-            if word == target_word:
-                word_history.append((date, word, correct, incorrect, skipped))
-        return word_history
+        return [
+            (date, target_word, correct, incorrect, skipped)
+            for date, correct, incorrect, skipped in self.get_word_index().history(target_word)
+        ]
 
     def daily_word_attempts_str(self):
         history = self.daily_words_attempt_history()
@@ -178,61 +552,293 @@ class UserStats:
 
         return output
 
-    def create_table(self, save_path, from_today=True, num_days=14):
-        date_list = self.get_ordered_dates(reversed=False)
+    def get_bucket_stats(self, bucket="day"):
+        """
+        Returns the DayCounts rolled up into day, week or month buckets, see
+        rollup_daily_stats. Each rollup is computed once.
+        """
+        if bucket == "day":
+            return self.day_counts
+        rollups = self.__dict__.setdefault("_bucket_stats", {})
+        if bucket not in rollups:
+            rollups[bucket] = rollup_daily_stats(self.day_counts, bucket)
+        return rollups[bucket]
+
+    def get_word_table_data(self, from_today=True, num_days=14, bucket="day"):
+        """
+        Collects the per word grades of the last num_days buckets (days, weeks or
+        months) for the accuracy by word table.
+        Format: data[label][word] = (correct, incorrect, skipped, accuracy_pc), with
+        'dd/mm/yy' labels for days and weeks and 'Mon yy' ones for months.
+        """
+        bucket_stats = self.get_bucket_stats(bucket)
+        date_list = sort_dates(bucket_stats)
         from_date = get_from_date(date_list=date_list, from_today=from_today)
-        dates_columns = generate_date_array(from_date=from_date, num_days=num_days)
-        formatted_dates = [
-            datetime.strptime(date, "%d-%m-%Y").strftime("%d/%m/%y")
-            for date in dates_columns
-        ]
+        dates_columns = generate_bucket_array(
+            from_date=from_date, num_buckets=num_days, bucket=bucket
+        )
+        formatted_dates = [bucket_label(date, bucket) for date in dates_columns]
         data = {}
         for date, f_date in zip(dates_columns, formatted_dates):
-            if date in date_list:
-                data[f_date] = {}
-                for word, grades in self.daily_stats[date]["by_word"].items():
-                    data[f_date][word] = (
-                        grades["correct"],
-                        grades["incorrect"],
-                        grades["skipped"],
-                        grades["word_accuracy_pc"],
-                    )
+            if date in bucket_stats:
+                data[f_date] = {
+                    word: (counts.correct, counts.incorrect, counts.skipped, counts.accuracy_pc())
+                    for word, counts in bucket_stats[date].words().items()
+                }
             else:  # fill in dates user wasnt active with empty obj
                 data[f_date] = {}
-        fig = make_word_table(data)
-        save_png(fig, save_path)
+        return data
+
+    def create_table(
+        self, save_path=None, from_today=True, num_days=14, cache=None, bucket="day"
+    ):
+        """
+        Renders the accuracy by word table. The PNG is written to save_path when
+        given, otherwise it is returned as an in-memory buffer. With a RenderCache
+        the PNG is reused while the table data is unchanged.
+        """
+        data = self.get_word_table_data(
+            from_today=from_today, num_days=num_days, bucket=bucket
+        )
+        xlabel = window_label(num_days, bucket)
+        if save_path is None:
+            return self._render_table_png(data, xlabel, cache=cache)
+        save_png(render_word_table(data, xlabel), save_path)
         return save_path
 
-    def get_percentage_of_word_accuracy_img(self, from_today=True):
-        fig = plot_percentage_of_words_accuracy_bar_chart(
-            self.daily_stats, from_today=from_today
+    @staticmethod
+    def _render_table_png(data, xlabel, cache=None):
+        if cache is None:
+            return png_buffer(render_word_table(data, xlabel))
+        png = cache.get_or_render(
+            cache.key("word_table", xlabel, data),
+            lambda: png_buffer(render_word_table(data, xlabel)).getvalue(),
+        )
+        return io.BytesIO(png)
+
+    def get_percentage_of_word_accuracy_img(
+        self, from_today=True, cache=None, window=14, bucket="day"
+    ):
+        bucket_stats = self.get_bucket_stats(bucket)
+
+        def render():
+            fig = accuracy_bar_chart_template(window, bucket).update(
+                bucket_stats, from_today=from_today
+            )
+            return png_buffer(fig)
+
+        if cache is None:
+            return render()
+        stacks = build_stacks(bucket_stats, from_today=from_today, window=window, bucket=bucket)
+        png = cache.get_or_render(
+            cache.key("bar_chart", bucket, stacks), lambda: render().getvalue()
+        )
+        return io.BytesIO(png)
+
+    def create_pdf_report(
+        self, filename=None, chart_format="png", cache=None, window=14, bucket="day"
+    ):
+        """
+        Builds the pdf report.
+
+        Parameters:
+        filename (str | file): File path where the PDF report will be saved, or a writable
+            binary stream (e.g. an HTTP response body) it is written to. None returns the
+            PDF as bytes, without touching the filesystem.
+        chart_format (str): "png" embeds the charts as bitmaps, "vector" draws them
+            as vector graphics, which renders faster, gives smaller files and prints sharply.
+            "native" is "vector" with the word table drawn directly with reportlab
+            rather than through pandas and seaborn.
+        cache (RenderCache): (Optional) Cache of rendered charts and reports. The whole
+            report is reused when none of its inputs changed, otherwise the unchanged charts are.
+        window (int): Number of buckets covered by the charts, counted back from the most recent activity.
+        bucket (str): "day", "week" or "month", the period each bar and table column sums up.
+
+        Returns:
+        str | file | bytes: filename, or the PDF bytes when filename is None.
+        """
+        check_report_options(chart_format, window, bucket)
+        date_generated = get_from_date(from_today=True)
+        if cache is not None:
+            report_key = cache.key(
+                "report",
+                self.uid,
+                date_generated,
+                chart_format,
+                bucket,
+                build_stacks(
+                    self.get_bucket_stats(bucket), from_today=False, window=window, bucket=bucket
+                ),
+                self.get_word_table_data(from_today=False, num_days=window, bucket=bucket),
+            )
+            report = cache.get(report_key)
+            if report is not None:
+                return _write_pdf(filename, report)
+
+        from utils.pdf_maker import init_pdf
+
+        # Streams and bytes are assembled in memory, a path is written directly
+        output = filename if isinstance(filename, str) else io.BytesIO()
+        pdf = init_pdf(filename=output)
+        self.draw_pdf_pages(
+            pdf,
+            chart_format=chart_format,
+            cache=cache,
+            window=window,
+            bucket=bucket,
+            date_generated=date_generated,
+        )
+        # draw_ruler(pdf)
+        with span("pdf.save"):
+            pdf.save()
+        if isinstance(filename, str):
+            if cache is not None:
+                with open(filename, "rb") as file:
+                    cache.put(report_key, file.read())
+            return filename
+        report = output.getvalue()
+        if cache is not None:
+            cache.put(report_key, report)
+        return _write_pdf(filename, report)
+
+    def draw_pdf_pages(
+        self,
+        pdf,
+        chart_format="png",
+        cache=None,
+        window=14,
+        bucket="day",
+        date_generated=None,
+    ):
+        """
+        Draws the report onto pdf, from its header to the footer of its last page,
+        which is left open: the caller ends it with pdf.showPage or pdf.save. Used
+        by create_pdf_report, and to put several reports into one document.
+
+        Parameters:
+        pdf (Canvas): The canvas to draw on, on a blank page.
+        chart_format, cache, window, bucket: See create_pdf_report.
+        date_generated (str): (Optional) Date printed in the header, today by default.
+
+        Returns:
+        int: The number of pages drawn.
+        """
+        check_report_options(chart_format, window, bucket)
+        bucket_stats = self.get_bucket_stats(bucket)
+        xlabel = window_label(window, bucket)
+        if date_generated is None:
+            date_generated = get_from_date(from_today=True)
+
+        # reportlab and PIL are only needed when a pdf is actually drawn
+        from utils.pdf_maker import (
+            set_title,
+            set_image,
+            set_text,
+            draw_word_table,
+            flow_layout,
+        )
+        from utils.vector_figures import draw_figure
+
+        vector = chart_format in ("vector", "native")
+
+        def draw_bar_chart(y):
+            with span("bar_chart", chart_format=chart_format):
+                _draw_bar_chart(y)
+
+        def _draw_bar_chart(y):
+            if vector:
+                figure = accuracy_bar_chart_template(window, bucket).update(
+                    bucket_stats, from_today=False
+                )
+                draw_figure(pdf=pdf, fig=figure, x=MARGIN_X, y=y, max_width=BAR_CHART_WIDTH)
+            else:
+                figure = self.get_percentage_of_word_accuracy_img(
+                    from_today=False, cache=cache, window=window, bucket=bucket
+                )
+                set_image(pdf=pdf, x=MARGIN_X, y=y, image=figure, max_width=BAR_CHART_WIDTH)
+
+        def table_drawer(data):
+            # Each table is rendered on its own, so it is cached separately
+            def draw_table(y):
+                with span("word_table", chart_format=chart_format, words=len(data)):
+                    _draw_table(y)
+
+            def _draw_table(y):
+                if chart_format == "native":
+                    draw_word_table(
+                        pdf,
+                        data,
+                        x=MARGIN_X,
+                        y=y,
+                        width=TABLE_WIDTH,
+                        height=table_height,
+                        xlabel=xlabel,
+                    )
+                elif vector:
+                    draw_figure(
+                        pdf=pdf,
+                        fig=render_word_table(data, xlabel),
+                        x=MARGIN_X,
+                        y=y,
+                        max_width=TABLE_WIDTH,
+                    )
+                else:
+                    table = self._render_table_png(data, xlabel, cache=cache)
+                    set_image(pdf=pdf, x=MARGIN_X, y=y, image=table, max_width=TABLE_WIDTH)
+
+            return draw_table
+
+        def draw_footer():
+            disclaimer = "Accuracy is based on the user's entries during the speech exercises ([✔] Correct, [✘] Try Again)"
+            set_text(pdf=pdf, text=disclaimer, x=80, y=25, font_size=10)
+
+        table_height = TABLE_WIDTH * FIGURE_ASPECT
+        tables = split_word_table(
+            self.get_word_table_data(from_today=False, num_days=window, bucket=bucket)
+        )
+        blocks = [(BAR_CHART_WIDTH * FIGURE_ASPECT, draw_bar_chart)] + [
+            (table_height, table_drawer(data)) for data in tables
+        ]
+        placements = flow_layout(
+            [height for height, _ in blocks],
+            first_top=CONTENT_TOP,
+            top=CONTINUED_TOP,
+            bottom=CONTENT_BOTTOM,
+            gap=SECTION_GAP,
         )
-        figure1_path = f"{DATA_PATH}/figure1.png"
-        png = save_png(fig, figure1_path)
-        return png
 
-    def create_pdf_report(self, filename):
-        pdf = init_pdf(filename=filename)
         set_title(pdf, height=730)
         set_image(
-            pdf=pdf, x=40, y=700, max_height=70, image=f"{DATA_PATH}/say66_logo.png")
+            pdf=pdf, x=MARGIN_X, y=700, max_height=70, image=f"{DATA_PATH}/say66_logo.png")
+        text = f"Player User ID:   {self.uid}"
+        set_text(pdf=pdf, text=text, x=MARGIN_X, y=650)
+        text = f"Date Generated:  {date_generated}"
+        set_text(pdf=pdf, text=text, x=MARGIN_X, y=675)
 
-        figure = self.get_percentage_of_word_accuracy_img(from_today=False)
-        table = self.create_table(
-            from_today=False, save_path=f"{DATA_PATH}/table.png")
+        page = 0
+        for (block_page, y), (_, draw) in zip(placements, blocks):
+            if block_page != page:
+                draw_footer()
+                pdf.showPage()
+                page = block_page
+                text = f"Player User ID:   {self.uid}   (page {page + 1})"
+                set_text(pdf=pdf, text=text, x=MARGIN_X, y=CONTINUED_TOP + 20)
+            draw(y)
+        draw_footer()
+        return page + 1
 
-        set_image(pdf=pdf, x=40, y=420, image=figure, max_width=520)
-        set_image(pdf=pdf, x=40, y=200, image=table, max_width=570)
-        text = f"Player User ID:   {self.uid}"
-        set_text(pdf=pdf, text=text, x=40, y=650)
-        text = f"Date Generated:  {get_from_date(from_today=True)}"
-        set_text(pdf=pdf, text=text, x=40, y=675)
-        disclaimer = "Accuracy is based on the user's entries during the speech exercises ([✔] Correct, [✘] Try Again)"
-        set_text(pdf=pdf, text=disclaimer, x=80, y=25, font_size=10)
-        # draw_ruler(pdf)
-        pdf.save()
-        return filename
 
+def _write_pdf(filename, report):
+    """
+    Delivers finished PDF bytes to the output of create_pdf_report: a file path,
+    a writable binary stream, or None to return them.
+    """
+    if filename is None:
+        return report
+    if isinstance(filename, str):
+        with open(filename, "wb") as file:
+            file.write(report)
+    else:
+        filename.write(report)
+    return filename
 
-if __name__ == "__main__":
-    up = "test/data/user_productions-3.txt"
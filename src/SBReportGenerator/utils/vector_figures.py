@@ -0,0 +1,194 @@
+import os
+from matplotlib import font_manager
+from matplotlib.backend_bases import GraphicsContextBase, RendererBase
+from matplotlib.path import Path
+from matplotlib.transforms import Affine2D
+import matplotlib.pyplot as plt
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import FILL_NON_ZERO
+from PIL import Image
+
+from utils.instrumentation import traced
+
+JOIN_STYLES = {"miter": 0, "round": 1, "bevel": 2}
+CAP_STYLES = {"butt": 0, "round": 1, "projecting": 2}
+
+
+def register_font(prop):
+    """
+    Registers the TrueType font matplotlib resolves for the given font
+    properties with reportlab, once per process, and returns its reportlab name.
+    """
+    font_path = font_manager.findfont(prop)
+    font_name = os.path.splitext(os.path.basename(font_path))[0]
+    if font_name not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(font_name, font_path))
+    return font_name
+
+
+class CanvasRenderer(RendererBase):
+    """
+    A minimal matplotlib renderer drawing straight onto a reportlab canvas, so
+    charts end up in the pdf as vector paths instead of embedded bitmaps.
+    Text is drawn with the same TrueType fonts matplotlib lays it out with,
+    embedded as subsets, so the ✔/✘ symbols survive and the text stays selectable.
+    """
+
+    def __init__(self, pdf, width, height, dpi, x, y, scale):
+        super().__init__()
+        self.pdf = pdf
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self.scale = scale
+        self._to_page = Affine2D().scale(scale).translate(x, y)
+
+    def flipy(self):
+        return False
+
+    def get_canvas_width_height(self):
+        return self.width, self.height
+
+    def points_to_pixels(self, points):
+        return points * self.dpi / 72.0
+
+    def new_gc(self):
+        return GraphicsContextBase()
+
+    def _add_segments(self, pdf_path, path, transform):
+        last = (0, 0)
+        for points, code in path.iter_segments(
+            transform + self._to_page, remove_nans=True, simplify=False
+        ):
+            if code == Path.MOVETO:
+                pdf_path.moveTo(*points)
+            elif code == Path.LINETO:
+                pdf_path.lineTo(*points)
+            elif code == Path.CURVE3:
+                # Raise the quadratic bezier to the cubic one reportlab supports
+                cx, cy, ex, ey = points
+                pdf_path.curveTo(
+                    last[0] + 2 / 3 * (cx - last[0]),
+                    last[1] + 2 / 3 * (cy - last[1]),
+                    ex + 2 / 3 * (cx - ex),
+                    ey + 2 / 3 * (cy - ey),
+                    ex,
+                    ey,
+                )
+            elif code == Path.CURVE4:
+                pdf_path.curveTo(*points)
+            elif code == Path.CLOSEPOLY:
+                pdf_path.close()
+                continue
+            last = points[-2:]
+
+    def _set_clip(self, gc):
+        rect = gc.get_clip_rectangle()
+        if rect is not None:
+            (x0, y0), (x1, y1) = self._to_page.transform(rect.get_points())
+            clip = self.pdf.beginPath()
+            clip.rect(x0, y0, x1 - x0, y1 - y0)
+            self.pdf.clipPath(clip, stroke=0, fill=0)
+        clip_path, clip_transform = gc.get_clip_path()
+        if clip_path is not None:
+            clip = self.pdf.beginPath()
+            self._add_segments(clip, clip_path, clip_transform)
+            self.pdf.clipPath(clip, stroke=0, fill=0)
+
+    def draw_path(self, gc, path, transform, rgbFace=None):
+        pdf = self.pdf
+        stroke_rgba = gc.get_rgb()
+        linewidth = gc.get_linewidth()
+        fill = rgbFace is not None and (len(rgbFace) < 4 or rgbFace[3] > 0)
+        stroke = linewidth > 0 and stroke_rgba[3] > 0
+        if not (fill or stroke):
+            return
+
+        pdf.saveState()
+        self._set_clip(gc)
+        if fill:
+            alpha = gc.get_alpha() if gc.get_forced_alpha() or len(rgbFace) < 4 else rgbFace[3]
+            pdf.setFillColorRGB(*rgbFace[:3])
+            pdf.setFillAlpha(alpha)
+        if stroke:
+            pdf.setStrokeColorRGB(*stroke_rgba[:3])
+            pdf.setStrokeAlpha(stroke_rgba[3])
+            pdf.setLineWidth(self.points_to_pixels(linewidth) * self.scale)
+            pdf.setLineJoin(JOIN_STYLES.get(gc.get_joinstyle(), 0))
+            pdf.setLineCap(CAP_STYLES.get(gc.get_capstyle(), 0))
+            offset, dashes = gc.get_dashes()
+            if dashes:
+                factor = self.points_to_pixels(1) * self.scale
+                pdf.setDash([d * factor for d in dashes], (offset or 0) * factor)
+
+        pdf_path = pdf.beginPath()
+        self._add_segments(pdf_path, path, transform)
+        pdf.drawPath(pdf_path, stroke=int(stroke), fill=int(fill), fillMode=FILL_NON_ZERO)
+        pdf.restoreState()
+
+    def draw_text(self, gc, x, y, s, prop, angle, ismath=False, mtext=None):
+        if ismath:
+            # Mathtext has no single-font equivalent, fall back to glyph outlines
+            return super().draw_text(gc, x, y, s, prop, angle, ismath, mtext)
+        pdf = self.pdf
+        (px, py), = self._to_page.transform([(x, y)])
+        rgba = gc.get_rgb()
+        pdf.saveState()
+        self._set_clip(gc)
+        pdf.setFillColorRGB(*rgba[:3])
+        pdf.setFillAlpha(gc.get_alpha() if gc.get_forced_alpha() else rgba[3])
+        pdf.translate(px, py)
+        pdf.rotate(angle)
+        pdf.setFont(
+            register_font(prop),
+            self.points_to_pixels(prop.get_size_in_points()) * self.scale,
+        )
+        pdf.drawString(0, 0, s)
+        pdf.restoreState()
+
+    def draw_image(self, gc, x, y, im):
+        height, width = im.shape[:2]
+        (px, py), = self._to_page.transform([(x, y)])
+        self.pdf.saveState()
+        self._set_clip(gc)
+        self.pdf.drawImage(
+            ImageReader(Image.fromarray(im)),
+            px,
+            py,
+            width * self.scale,
+            height * self.scale,
+            mask="auto",
+        )
+        self.pdf.restoreState()
+
+
+@traced("draw_figure")
+def draw_figure(pdf, fig, x, y, max_width=None, max_height=None):
+    """
+    Draw a matplotlib figure onto a PDF page as vector graphics, scaled to fit
+    within the specified maximum width or height while keeping its aspect ratio.
+    The figure is closed afterwards.
+
+    :param pdf: The canvas object to draw the figure on.
+    :param fig: The matplotlib figure.
+    :param x: The x-coordinate of the lower-left corner of the figure.
+    :param y: The y-coordinate of the lower-left corner of the figure.
+    :param max_width: (Optional) The maximum width the figure should be scaled to.
+    :param max_height: (Optional) The maximum height the figure should be scaled to.
+    """
+    fw, fh = fig.bbox.width, fig.bbox.height
+
+    if max_width and max_height:
+        scale_factor = min(max_width / fw, max_height / fh)
+    elif max_width:
+        scale_factor = max_width / fw
+    elif max_height:
+        scale_factor = max_height / fh
+    else:
+        scale_factor = 72.0 / fig.dpi  # Natural size of the figure in points
+
+    renderer = CanvasRenderer(pdf, fw, fh, fig.dpi, x, y, scale_factor)
+    fig.draw(renderer)
+    plt.close(fig)
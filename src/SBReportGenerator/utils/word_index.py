@@ -0,0 +1,127 @@
+import datetime
+from bisect import bisect_left, bisect_right
+
+from utils.user_dates import date_to_str, parse_date
+
+
+class WordHistory:
+    """
+    The attempts at one word: its active dates in order, with the counts of
+    each day and running totals for range sums.
+    """
+
+    __slots__ = ("dates", "date_strs", "counts", "correct_totals", "graded_totals")
+
+    def __init__(self, days):
+        days = sorted(days)
+        self.dates = [date for date, _ in days]
+        self.date_strs = [date_to_str(date) for date in self.dates]
+        self.counts = [counts for _, counts in days]
+        # correct_totals[i] is the sum over the first i days, so a range is a difference
+        self.correct_totals, self.graded_totals = [0], [0]
+        for correct, incorrect, _ in self.counts:
+            self.correct_totals.append(self.correct_totals[-1] + correct)
+            self.graded_totals.append(self.graded_totals[-1] + correct + incorrect)
+
+    def span(self, start=None, end=None):
+        """
+        Index range of the days between start and end, both included.
+        """
+        first = 0 if start is None else bisect_left(self.dates, start)
+        last = len(self.dates) if end is None else bisect_right(self.dates, end)
+        return first, max(first, last)
+
+
+class WordIndex:
+    """
+    Index from word to its sorted per day history, built once from daily_stats.
+
+    Listing the words and the first and last attempt take constant time; a
+    history or accuracy over a date range takes a binary search (plus the
+    length of the returned history).
+
+    :param daily_stats: Stats keyed by 'dd-mm-yyyy' date, as UserStats.daily_stats.
+    """
+
+    def __init__(self, daily_stats):
+        days_by_word = {}
+        for day, stats in daily_stats.items():
+            date = parse_date(day)
+            for word, word_stats in stats["by_word"].items():
+                days_by_word.setdefault(word, []).append(
+                    (
+                        date,
+                        (word_stats["correct"], word_stats["incorrect"], word_stats["skipped"]),
+                    )
+                )
+        self._histories = {
+            word: WordHistory(days) for word, days in days_by_word.items()
+        }
+        self._words = sorted(self._histories)
+
+    @staticmethod
+    def _to_date(date):
+        if date is None or isinstance(date, datetime.date):
+            return date
+        return parse_date(date)
+
+    def words(self):
+        """
+        Returns all the practised words, sorted.
+        """
+        return list(self._words)
+
+    def __contains__(self, word):
+        return word in self._histories
+
+    def history(self, word, start=None, end=None):
+        """
+        Returns the attempts at word as [(date, correct, incorrect, skipped), ...]
+        in date order, optionally limited to the dates from start to end included.
+        Dates are 'dd-mm-yyyy' strings; start and end may also be datetime.date.
+        """
+        history = self._histories.get(word)
+        if history is None:
+            return []
+        first, last = history.span(self._to_date(start), self._to_date(end))
+        return [
+            (date, *counts)
+            for date, counts in zip(history.date_strs[first:last], history.counts[first:last])
+        ]
+
+    def first_attempt(self, word):
+        """
+        Returns the 'dd-mm-yyyy' date word was first practised, None if never.
+        """
+        history = self._histories.get(word)
+        return history.date_strs[0] if history else None
+
+    def last_attempt(self, word):
+        """
+        Returns the 'dd-mm-yyyy' date word was last practised, None if never.
+        """
+        history = self._histories.get(word)
+        return history.date_strs[-1] if history else None
+
+    def accuracy(self, word, start=None, end=None):
+        """
+        Returns the accuracy percentage of word over the dates from start to end
+        included (the whole history by default), rounded like the daily stats.
+        0.0 when nothing was graded in that range.
+        """
+        history = self._histories.get(word)
+        if history is None:
+            return 0.0
+        first, last = history.span(self._to_date(start), self._to_date(end))
+        correct = history.correct_totals[last] - history.correct_totals[first]
+        graded = history.graded_totals[last] - history.graded_totals[first]
+        if graded == 0:
+            return 0.0
+        return round(correct / graded, 2) * 100
+
+    def rolling_accuracy(self, word, date, days=7):
+        """
+        Returns the accuracy percentage of word over the days days ending on date.
+        """
+        end = self._to_date(date)
+        return self.accuracy(word, end - datetime.timedelta(days=days - 1), end)
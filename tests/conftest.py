@@ -0,0 +1,12 @@
+import os
+import sys
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+# The package imports its helpers as top level `utils`, like the benchmarks
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path[:0] = [SRC, os.path.join(SRC, "SBReportGenerator")]
+
+import SBReportGenerator  # noqa: E402,F401
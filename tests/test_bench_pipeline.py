@@ -0,0 +1,39 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+
+from bench_pipeline import compare  # noqa: E402
+
+
+def result(seconds, **fields):
+    return {
+        "rows": 1000,
+        "words": 60,
+        "days": 365,
+        "seed": 0,
+        "chart_format": "png",
+        **fields,
+        "stages": {"pdf_total": seconds},
+    }
+
+
+def test_regression_against_the_same_log_and_chart_format():
+    baseline = {"results": [result(1.0)]}
+    assert compare([result(1.1)], baseline, tolerance=0.25) == ([], [])
+    assert compare([result(2.0)], baseline, tolerance=0.25) == ([(1000, "pdf_total", 2.0, 1.0)], [])
+
+
+def test_other_chart_format_or_log_is_not_compared():
+    baseline = {"results": [result(1.0)]}
+    for fields in ({"chart_format": "native"}, {"words": 30}, {"days": 30}, {"seed": 1}):
+        current = result(0.1, **fields)
+        assert compare([current], baseline, tolerance=0.25) == ([], [current])
+
+
+def test_run_wide_chart_format_of_older_baselines():
+    old = result(1.0)
+    del old["chart_format"]
+    baseline = {"chart_format": "native", "results": [old]}
+    assert compare([result(2.0, chart_format="native")], baseline, tolerance=0.25)[0]
+    assert compare([result(2.0)], baseline, tolerance=0.25)[1]
@@ -0,0 +1,105 @@
+import io
+import re
+
+import pytest
+
+from SBReportGenerator import generate_caseload_report
+from utils.caseload import CONTENTS_ROWS_PER_PAGE
+
+USERS = [f"kid{number:02d}@example.com" for number in range(CONTENTS_ROWS_PER_PAGE + 2)]
+BAD_USER = "kid99/bad"
+
+
+def caseload_log():
+    lines = []
+    for number, uid in enumerate(USERS):
+        for day in range(1, 3 + number % 3):
+            lines.append(f"{uid},Cat,1,0{day}-03-2024 10:00:00\n")
+            lines.append(f"{uid},Dog,{number % 2},0{day}-03-2024 10:00:01\n")
+    lines.append(f"{BAD_USER},Pig\n")
+    return lines
+
+
+def pdf_objects(pdf_bytes):
+    """
+    The pdf's objects by number, as the raw bytes between obj and endobj.
+    """
+    return {
+        int(number): body
+        for number, body in re.findall(rb"(?m)^(\d+) 0 obj\n(.*?)endobj", pdf_bytes, re.S)
+    }
+
+
+def refs(data):
+    return [int(number) for number in re.findall(rb"(\d+) 0 R", data)]
+
+
+@pytest.fixture(scope="module")
+def caseload():
+    output = io.BytesIO()
+    results = generate_caseload_report(caseload_log(), output, chart_format="native")
+    return results, pdf_objects(output.getvalue())
+
+
+def test_sections(caseload):
+    results, _ = caseload
+    assert [result["uid"] for result in results] == sorted(USERS + [BAD_USER])
+    # Two contents pages, then one section after the other
+    page = 3
+    for result in results:
+        assert result["page"] == page
+        page += result["pages"]
+    failed = [result for result in results if not result["ok"]]
+    assert [result["uid"] for result in failed] == [BAD_USER]
+    assert failed[0]["pages"] == 1
+
+
+def test_page_tree(caseload):
+    results, objects = caseload
+    (pages,) = [body for body in objects.values() if b"/Type /Pages" in body]
+    count = int(re.search(rb"/Count (\d+)", pages).group(1))
+    assert count == 2 + sum(result["pages"] for result in results)
+    assert len(refs(re.search(rb"/Kids \[(.*?)\]", pages, re.S).group(1))) == count
+
+
+def test_outline_and_contents_links(caseload):
+    results, objects = caseload
+    (pages,) = [body for body in objects.values() if b"/Type /Pages" in body]
+    kids = refs(re.search(rb"/Kids \[(.*?)\]", pages, re.S).group(1))
+    first_pages = {result["uid"]: kids[result["page"] - 1] for result in results}
+
+    outline = {
+        re.search(rb"/Title \((.*?)\)", body).group(1).decode(): refs(body)[0]
+        for body in objects.values()
+        if b"/Parent" in body and b"/Title" in body
+    }
+    assert outline.pop("Contents") == kids[0]
+    assert outline == first_pages
+
+    links = {
+        re.search(rb"/Contents \((.*?)\)", body).group(1).decode(): refs(body)[0]
+        for body in objects.values()
+        if b"/Subtype /Link" in body
+    }
+    assert links == first_pages
+    # The rows that did not fit on the first contents page are on the second
+    annotations = [
+        len(refs(re.search(rb"/Annots \[(.*?)\]", objects[kid], re.S).group(1))) for kid in kids[:2]
+    ]
+    assert annotations == [CONTENTS_ROWS_PER_PAGE, len(results) - CONTENTS_ROWS_PER_PAGE]
+
+
+def test_shared_resources(caseload):
+    _, objects = caseload
+    # One colour scale shading, and the logo with its soft mask, for the whole document
+    assert sum(b"/ShadingType" in body for body in objects.values()) == 1
+    assert sum(b"/Subtype /Image" in body for body in objects.values()) == 2
+
+
+def test_pages_are_compressed(caseload):
+    _, objects = caseload
+    page_bodies = [body for body in objects.values() if re.search(rb"/Type /Page\b(?!s)", body)]
+    assert page_bodies
+    for body in page_bodies:
+        content = int(re.search(rb"/Contents (\d+) 0 R", body).group(1))
+        assert b"/FlateDecode" in objects[content]
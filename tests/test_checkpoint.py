@@ -0,0 +1,128 @@
+import datetime
+import os
+import shutil
+import time
+
+import utils.user_stats
+from SBReportGenerator import user_productions_example_file
+from utils.checkpoint import aggregate_incrementally, load_checkpoint
+from utils.user_stats import DailyStatsBuilder
+
+APPENDED = [
+    "username_email@email.com,Banana,1,24-03-2024 10:00:00\n",
+    "username_email@email.com,Banana,0,24-03-2024 10:00:05\n",
+    "username_email@email.com,Orange,2,25-03-2024 09:30:00\n",
+]
+
+
+def full_aggregate(path):
+    with open(path, "r") as file:
+        return DailyStatsBuilder().update(file).get_daily_stats()
+
+
+def copy_example(tmp_path):
+    path = str(tmp_path / "user_productions.txt")
+    shutil.copyfile(user_productions_example_file, path)
+    return path
+
+
+def test_resume_matches_full_aggregation(tmp_path):
+    log, checkpoint = copy_example(tmp_path), str(tmp_path / "checkpoint.json")
+    builder, resumed = aggregate_incrementally(log, checkpoint)
+    assert not resumed
+    assert builder.get_daily_stats() == full_aggregate(log)
+
+    with open(log, "a") as file:
+        file.writelines(APPENDED)
+    builder, resumed = aggregate_incrementally(log, checkpoint)
+    assert resumed
+    assert builder.get_daily_stats() == full_aggregate(log)
+
+
+def test_truncated_file_is_aggregated_from_the_start(tmp_path):
+    log, checkpoint = copy_example(tmp_path), str(tmp_path / "checkpoint.json")
+    with open(log, "a") as file:
+        file.writelines(APPENDED)
+    aggregate_incrementally(log, checkpoint)
+
+    shutil.copyfile(user_productions_example_file, log)
+    builder, resumed = aggregate_incrementally(log, checkpoint)
+    assert not resumed
+    assert builder.get_daily_stats() == full_aggregate(log)
+
+
+def test_partial_trailing_line(tmp_path):
+    log, checkpoint = copy_example(tmp_path), str(tmp_path / "checkpoint.json")
+    expected = full_aggregate(log)
+    # The app is still writing the last line
+    with open(log, "a") as file:
+        file.write("username_email@email.com,Banana,1,24-0")
+    builder, _ = aggregate_incrementally(log, checkpoint)
+    assert builder.get_daily_stats() == expected
+    offset = load_checkpoint(checkpoint)["offset"]
+
+    # Finished on the next run: read from the same offset and counted
+    with open(log, "a") as file:
+        file.write("3-2024 10:00:00\n")
+    builder, resumed = aggregate_incrementally(log, checkpoint)
+    assert resumed
+    assert builder.get_daily_stats() == full_aggregate(log)
+    assert load_checkpoint(checkpoint)["offset"] > offset
+
+
+def test_complete_trailing_line_without_newline_is_counted(tmp_path):
+    log, checkpoint = copy_example(tmp_path), str(tmp_path / "checkpoint.json")
+    with open(log, "a") as file:
+        file.write(APPENDED[0].rstrip("\n"))
+    builder, _ = aggregate_incrementally(log, checkpoint)
+    assert builder.get_daily_stats() == full_aggregate(log)
+
+
+def write_long_log(path, days=60, words=30, attempts=600):
+    start = datetime.date(2024, 1, 1)
+    with open(path, "w") as file:
+        for day in range(days):
+            date = (start + datetime.timedelta(days=day)).strftime("%d-%m-%Y")
+            for attempt in range(attempts):
+                second = 7 * 3600 + attempt * 60
+                file.write(
+                    f"kid,Word{attempt % words},{attempt % 3},"
+                    f"{date} {second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}\n"
+                )
+
+
+def test_resumed_run_is_cheaper_than_a_full_one(tmp_path, monkeypatch):
+    log, checkpoint = str(tmp_path / "user_productions.txt"), str(tmp_path / "checkpoint.json")
+    write_long_log(log)
+    full_seconds = []
+    for _ in range(3):
+        start = time.perf_counter()
+        aggregate_incrementally(log, str(tmp_path / "full.json"))
+        full_seconds.append(time.perf_counter() - start)
+        os.remove(tmp_path / "full.json")
+    aggregate_incrementally(log, checkpoint)
+    # The checkpoint holds the counts of the cells, not the rows
+    assert os.path.getsize(checkpoint) < os.path.getsize(log) / 10
+
+    parsed = []
+    iter_user_productions = utils.user_stats.iter_user_productions
+
+    def counting(up_contents, date_parser=None):
+        up_contents = list(up_contents)
+        parsed.extend(up_contents)
+        return iter_user_productions(up_contents, date_parser=date_parser)
+
+    monkeypatch.setattr(utils.user_stats, "iter_user_productions", counting)
+    resumed_seconds = []
+    for second in range(3):
+        with open(log, "a") as file:
+            file.write(f"kid,Word0,1,01-03-2024 23:00:0{second}\n")
+        start = time.perf_counter()
+        builder, resumed = aggregate_incrementally(log, checkpoint)
+        resumed_seconds.append(time.perf_counter() - start)
+        assert resumed
+    monkeypatch.undo()
+
+    assert len(parsed) == 3
+    assert builder.get_daily_stats() == full_aggregate(log)
+    assert min(resumed_seconds) < min(full_seconds) / 2
@@ -0,0 +1,70 @@
+import os
+
+from utils.columnar_cache import (
+    columnar_cache_path,
+    load_columnar_cache,
+    read_productions_frame_cached,
+)
+from utils.columnar_stats import ColumnarUserStats
+
+
+def write_log(path, uid, word, mtime_ns=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(f"{uid},{word},1,01-03-2024 10:00:00\n")
+        file.write(f"{uid},{word},0,02-03-2024 10:00:00\n")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def test_round_trip(tmp_path):
+    log = write_log(str(tmp_path / "user_productions.txt"), "kidA", "Apple")
+    cache_dir = str(tmp_path / "cache")
+    parsed = read_productions_frame_cached(log, cache_dir)
+    loaded = load_columnar_cache(log, cache_dir)
+    assert loaded is not None
+    assert loaded["uid"].astype(str).tolist() == parsed["uid"].astype(str).tolist()
+    assert loaded["word"].astype(str).tolist() == parsed["word"].astype(str).tolist()
+    assert loaded["grade"].tolist() == parsed["grade"].tolist()
+    assert (loaded["timestamp"].to_numpy() == parsed["timestamp"].to_numpy()).all()
+
+
+def test_modified_log_invalidates(tmp_path):
+    log = write_log(str(tmp_path / "user_productions.txt"), "kidA", "Apple")
+    cache_dir = str(tmp_path / "cache")
+    read_productions_frame_cached(log, cache_dir)
+    with open(log, "a") as file:
+        file.write("kidA,Apple,1,03-03-2024 10:00:00\n")
+    assert load_columnar_cache(log, cache_dir) is None
+    assert len(read_productions_frame_cached(log, cache_dir)) == 3
+
+
+def test_same_named_logs_do_not_share_an_entry(tmp_path):
+    # Same name, size and mtime: only the path tells the two children apart
+    mtime_ns = 1_700_000_000_000_000_000
+    log_a = write_log(str(tmp_path / "a" / "user_productions.txt"), "kidA", "Apple", mtime_ns)
+    log_b = write_log(str(tmp_path / "b" / "user_productions.txt"), "kidB", "Bread", mtime_ns)
+    assert os.path.getsize(log_a) == os.path.getsize(log_b)
+    cache_dir = str(tmp_path / "cache")
+    assert columnar_cache_path(log_a, cache_dir) != columnar_cache_path(log_b, cache_dir)
+
+    stats_a = ColumnarUserStats.from_file(log_a, columnar_cache=cache_dir)
+    stats_b = ColumnarUserStats.from_file(log_b, columnar_cache=cache_dir)
+    assert stats_a.uid == "kidA"
+    assert stats_b.uid == "kidB"
+    assert stats_b.get_all_words_list() == ["Bread"]
+    # Both entries stay valid, neither overwrote the other
+    assert load_columnar_cache(log_a, cache_dir)["uid"].astype(str).tolist() == ["kidA", "kidA"]
+    assert load_columnar_cache(log_b, cache_dir)["uid"].astype(str).tolist() == ["kidB", "kidB"]
+
+
+def test_entry_of_another_file_is_rejected(tmp_path):
+    mtime_ns = 1_700_000_000_000_000_000
+    log_a = write_log(str(tmp_path / "a" / "user_productions.txt"), "kidA", "Apple", mtime_ns)
+    log_b = write_log(str(tmp_path / "b" / "user_productions.txt"), "kidB", "Bread", mtime_ns)
+    cache_dir = str(tmp_path / "cache")
+    read_productions_frame_cached(log_a, cache_dir)
+    # An entry copied or renamed into b's place belongs to a and is not used
+    os.rename(columnar_cache_path(log_a, cache_dir), columnar_cache_path(log_b, cache_dir))
+    assert load_columnar_cache(log_b, cache_dir) is None
@@ -0,0 +1,40 @@
+import io
+
+from utils.pdf_maker import image_reader, init_pdf, set_image
+from utils.user_stats import DATA_PATH
+
+LOGO = f"{DATA_PATH}/say66_logo.png"
+
+
+def image_xobjects(pdf_bytes):
+    return pdf_bytes.count(b"/Subtype /Image")
+
+
+def render(draw):
+    output = io.BytesIO()
+    pdf = init_pdf(filename=output)
+    draw(pdf)
+    pdf.save()
+    return output.getvalue()
+
+
+def test_logo_is_stored_once_per_pdf():
+    once = render(lambda pdf: set_image(pdf, LOGO, x=40, y=700, max_height=70))
+
+    def draw_twice(pdf):
+        set_image(pdf, LOGO, x=40, y=700, max_height=70)
+        set_image(pdf, LOGO, x=40, y=400, max_width=200)
+        pdf.showPage()
+        set_image(pdf, LOGO, x=40, y=700, max_height=70)
+
+    twice = render(draw_twice)
+    # The logo and its alpha channel soft mask
+    assert image_xobjects(once) == 2
+    assert image_xobjects(twice) == image_xobjects(once)
+
+
+def test_decoded_image_is_reused_across_pdfs():
+    assert image_reader(LOGO) is image_reader(LOGO)
+    first = render(lambda pdf: set_image(pdf, LOGO, x=40, y=700, max_height=70))
+    second = render(lambda pdf: set_image(pdf, LOGO, x=40, y=700, max_height=70))
+    assert image_xobjects(first) == image_xobjects(second) == 2
@@ -0,0 +1,31 @@
+from utils.plotting import accuracy_bar_chart_template, plot_percentage_of_words_accuracy_bar_chart
+
+DATES = {
+    "01-12-2023": {"words_correct": 3, "words_incorrect": 1},
+    "20-11-2023": {"words_correct": 0, "words_incorrect": 2},
+}
+
+
+def bar_heights(fig, count):
+    return [round(bar.get_height(), 6) for bar in fig.axes[0].patches[:count]]
+
+
+def test_accuracy_bar_chart_follows_the_window():
+    fig = plot_percentage_of_words_accuracy_bar_chart(
+        DATES, from_today=False, window=6, bucket="week"
+    )
+    ax = fig.axes[0]
+    assert len(ax.patches) == 2 * 6
+    assert "6 Weeks" in ax.get_xlabel()
+    assert bar_heights(fig, 6) == bar_heights(
+        accuracy_bar_chart_template(6, "week").update(DATES, from_today=False), 6
+    )
+
+
+def test_accuracy_bar_chart_is_a_new_figure():
+    fig = plot_percentage_of_words_accuracy_bar_chart(DATES, from_today=False)
+    template = accuracy_bar_chart_template()
+    assert fig is not template.fig
+    template.update({"01-12-2023": {"words_correct": 0, "words_incorrect": 5}}, from_today=False)
+    # Updating the shared template for another report leaves the figure as it was
+    assert bar_heights(fig, 14)[-1] == 75
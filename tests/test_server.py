@@ -0,0 +1,68 @@
+import json
+import os
+import signal
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from SBReportGenerator import user_productions_example_file
+from SBReportGenerator.server import ReportServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = ReportServer(("127.0.0.1", 0), jobs=1, chart_format="native", quiet=True)
+    server.pids = server.warm_up()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post_report(server, body):
+    url = f"http://127.0.0.1:{server.server_address[1]}/report?chart_format=native"
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=body), timeout=120) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def get_stats(server):
+    url = f"http://127.0.0.1:{server.server_address[1]}/stats"
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return json.load(response)
+
+
+def read_example():
+    with open(user_productions_example_file, "rb") as file:
+        return file.read()
+
+
+def test_report(server):
+    status, pdf = post_report(server, read_example())
+    assert status == 200
+    assert pdf.startswith(b"%PDF")
+
+
+def test_bad_logs_are_client_errors(server):
+    assert post_report(server, b"")[0] == 400
+    assert post_report(server, b"kid,Cat,1,99-99-2024 10:00:00\n")[0] == 400
+    assert post_report(server, b"\xff\xfe")[0] == 400
+
+
+def test_pool_is_restarted_when_a_worker_dies(server):
+    executor = server.get_executor()
+    os.kill(server.pids[0], signal.SIGKILL)
+    status, body = post_report(server, read_example())
+    assert status == 503
+    assert b"BrokenProcessPool" in body
+    assert server.get_executor() is not executor
+    assert get_stats(server)["pool_restarts"] == 1
+
+    status, pdf = post_report(server, read_example())
+    assert status == 200
+    assert pdf.startswith(b"%PDF")
@@ -0,0 +1,189 @@
+import pytest
+
+from SBReportGenerator import user_productions_example_file
+from utils.columnar_stats import ColumnarUserStats
+from utils.plotting import build_stacks
+from utils.user_dates import format_date
+from utils.user_stats import (
+    DailyStatsBuilder,
+    DayCounts,
+    UserStats,
+    aggregate_by_uid,
+    grade_accuracy_pc,
+    rollup_daily_stats,
+)
+
+# Repeated timestamps, adjacent and not, a word only ever skipped, and the
+# date formats the app has written over time
+EDGE_LOG = """\
+kid,Cat,1,01-03-2024 10:00:00
+kid,Dog,0,01-03-2024 10:00:01
+kid,Cat,1,01-03-2024 10:00:02
+kid,Dog,1,01-03-2024 10:00:00
+kid,Pig,0,1/3/24 11:00:00
+kid,Pig,1,02/03/2024 11:00:00
+kid,Cat,1,2-3-2024 11:00:01
+kid,Cat,1,2-3-2024 11:00:01
+kid,Hat,2,03-03-24 09:00:00
+kid,Hat,2,03-03-2024 09:00:05
+kid,Cat,0,03-03-2024 09:00:05
+kid,Sun,2,04-03-2024 08:00:00
+kid,Sun,1,04-03-2024 08:00:01
+kid,Sun,0,04-03-2024 08:00:00
+"""
+
+
+def read_example():
+    with open(user_productions_example_file, "r") as file:
+        return file.read()
+
+
+def reference_daily_stats(lines):
+    """
+    daily_stats the plain way: the (word, grade) of each time of each day, then
+    the counts of each day in order of its times.
+    """
+    daily_data = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        _, word, grade, date_time = line.rstrip().split(",")
+        date, time = date_time.split(" ")
+        daily_data.setdefault(format_date(date), {})[time] = (word, grade)
+    daily_stats = {}
+    for day, times in daily_data.items():
+        by_word = {}
+        for word, grade in times.values():
+            counts = by_word.setdefault(word, {"correct": 0, "incorrect": 0, "skipped": 0})
+            counts[{"1": "correct", "0": "incorrect", "2": "skipped"}[grade]] += 1
+        for counts in by_word.values():
+            counts["word_accuracy_pc"] = grade_accuracy_pc(
+                counts["correct"], counts["correct"] + counts["incorrect"]
+            )
+        correct = sum(counts["correct"] for counts in by_word.values())
+        incorrect = sum(counts["incorrect"] for counts in by_word.values())
+        daily_stats[day] = {
+            "words_correct": correct,
+            "words_incorrect": incorrect,
+            "words_skipped": sum(counts["skipped"] for counts in by_word.values()),
+            "words_total": correct + incorrect,
+            "words_accuracy_pc": grade_accuracy_pc(correct, correct + incorrect),
+            "by_word": by_word,
+        }
+    return daily_stats
+
+
+def all_backends(log):
+    lines = log.splitlines(keepends=True)
+    return {
+        "reference": reference_daily_stats(lines),
+        "list": UserStats(lines).daily_stats,
+        "builder": UserStats.from_builder(DailyStatsBuilder().update(lines)).daily_stats,
+        "by_uid": UserStats.from_builder(next(iter(aggregate_by_uid(lines).values()))).daily_stats,
+        "columnar": ColumnarUserStats(lines).daily_stats,
+    }
+
+
+@pytest.mark.parametrize("log", [read_example(), EDGE_LOG], ids=["example", "edge"])
+def test_backends_agree(log):
+    stats = all_backends(log)
+    expected = stats.pop("reference")
+    for backend, daily_stats in stats.items():
+        assert daily_stats == expected, backend
+
+
+def test_edge_log_duplicates():
+    daily_stats = all_backends(EDGE_LOG)["reference"]
+    # 10:00:00 was re-graded later in the log: Dog correct replaces Cat correct
+    assert daily_stats["01-03-2024"]["words_correct"] == 2
+    assert daily_stats["01-03-2024"]["by_word"]["Dog"]["correct"] == 1
+    assert daily_stats["02-03-2024"]["by_word"]["Cat"]["correct"] == 1
+    # Skipped only: no graded attempt
+    assert daily_stats["03-03-2024"]["by_word"]["Hat"] == {
+        "correct": 0,
+        "incorrect": 0,
+        "skipped": 1,
+        "word_accuracy_pc": 0.0,
+    }
+
+
+def test_replaced_words_keep_the_order_of_their_times():
+    log = [
+        "kid,Dog,1,01-03-2024 10:00:00\n",
+        "kid,Cat,1,01-03-2024 10:00:01\n",
+        "kid,Pig,0,01-03-2024 10:00:00\n",
+    ]
+    expected = reference_daily_stats(log)["01-03-2024"]["by_word"]
+    by_word = UserStats.from_builder(DailyStatsBuilder().update(log)).daily_stats["01-03-2024"]["by_word"]
+    assert list(by_word) == list(expected) == ["Pig", "Cat"]
+    assert by_word == expected
+
+
+def test_builder_state_round_trip():
+    lines = EDGE_LOG.splitlines(keepends=True)
+    builder = DailyStatsBuilder().update(lines[:7])
+    resumed = DailyStatsBuilder.from_state(builder.to_state()).update(lines[7:])
+    assert resumed.get_daily_stats() == DailyStatsBuilder().update(lines).get_daily_stats()
+
+
+def test_builder_keeps_the_times_of_the_open_days_only():
+    log = [f"kid,Cat,1,0{day}-03-2024 10:00:0{second}\n" for day in range(1, 8) for second in range(3)]
+    builder = DailyStatsBuilder().update(log)
+    open_days = [date for date, day in builder.days.items() if day.times is not None]
+    assert len(open_days) == DailyStatsBuilder.OPEN_DAYS
+    assert open_days == list(builder.days)[-DailyStatsBuilder.OPEN_DAYS:]
+    assert "times" not in builder.to_state()["days"]["2024-03-01"]
+
+
+def test_repeated_timestamp_on_a_closed_day_is_counted_twice():
+    log = [
+        "kid,Cat,1,01-03-2024 10:00:00\n",
+        "kid,Cat,1,02-03-2024 10:00:00\n",
+        "kid,Cat,1,03-03-2024 10:00:00\n",
+        # Still open: replaces its first entry
+        "kid,Dog,0,02-03-2024 10:00:00\n",
+        # Closed once 03-03 was started
+        "kid,Cat,1,01-03-2024 10:00:00\n",
+    ]
+    daily_stats = DailyStatsBuilder().update(log).get_daily_stats()
+    assert daily_stats["01-03-2024"]["by_word"]["Cat"]["correct"] == 2
+    assert daily_stats["02-03-2024"] == reference_daily_stats(log)["02-03-2024"]
+
+
+def test_closing_a_day_keeps_the_order_of_its_replaced_words():
+    log = [
+        "kid,Dog,1,01-03-2024 10:00:00\n",
+        "kid,Cat,1,01-03-2024 10:00:01\n",
+        "kid,Pig,0,01-03-2024 10:00:00\n",
+        "kid,Cat,1,02-03-2024 10:00:00\n",
+        "kid,Cat,1,03-03-2024 10:00:00\n",
+    ]
+    builder = DailyStatsBuilder().update(log)
+    assert builder.days[min(builder.days)].times is None
+    assert builder.get_daily_stats() == reference_daily_stats(log)
+
+
+def test_daily_stats_view_is_built_on_first_access():
+    stats = UserStats(read_example().splitlines(keepends=True))
+    assert all(isinstance(day, DayCounts) for day in stats.get_bucket_stats("day").values())
+    # The report inputs are read from the counters
+    build_stacks(stats.get_bucket_stats("week"), from_today=False, window=8, bucket="week")
+    stats.get_word_table_data(from_today=False, num_days=8, bucket="week")
+    assert "daily_stats" not in stats.__dict__
+    assert stats.daily_stats == reference_daily_stats(read_example().splitlines())
+    assert stats.up_contents is None
+
+
+@pytest.mark.parametrize("bucket", ["week", "month"])
+def test_rollup_matches_the_daily_stats(bucket):
+    stats = UserStats(read_example().splitlines(keepends=True))
+    rollup = rollup_daily_stats(stats.day_counts, bucket)
+    for counts in rollup.values():
+        assert counts.correct == sum(word.correct for word in counts.by_word.values())
+    assert sum(counts.correct for counts in rollup.values()) == sum(
+        day["words_correct"] for day in stats.daily_stats.values()
+    )
+    columnar = ColumnarUserStats(read_example().splitlines(keepends=True))
+    assert {
+        day: counts.as_dict() for day, counts in columnar.get_bucket_stats(bucket).items()
+    } == {day: counts.as_dict() for day, counts in rollup.items()}
@@ -0,0 +1,36 @@
+import datetime
+
+from utils.user_dates import DATE_CACHE_SIZE, DateParser, _date_parser, parse_date
+
+
+def test_formats():
+    parser = DateParser()
+    expected = datetime.date(2024, 3, 2)
+    for date_str in ("02-03-2024", "2/3/2024", "02-03-24", "2/3/24"):
+        assert parser.parse(date_str) == expected
+
+
+def test_failures_are_not_cached():
+    parser = DateParser()
+    for day in range(100):
+        assert parser.parse(f"99-99-{day:04d}") is None
+    assert len(parser._cache) == 0
+    assert parser.parse("31-12-2024") == datetime.date(2024, 12, 31)
+    assert len(parser._cache) == 1
+
+
+def test_cache_size_is_bounded():
+    parser = DateParser(maxsize=10)
+    start = datetime.date(2024, 1, 1)
+    dates = [start + datetime.timedelta(days=day) for day in range(25)]
+    for date in dates:
+        assert parser.parse(date.strftime("%d-%m-%Y")) == date
+    # The oldest are dropped first
+    assert list(parser._cache) == [date.strftime("%d-%m-%Y") for date in dates[-10:]]
+    assert parser.parse(dates[0].strftime("%d-%m-%Y")) == dates[0]
+
+
+def test_process_wide_parser_is_bounded():
+    assert _date_parser.maxsize == DATE_CACHE_SIZE
+    parse_date("not a date")
+    assert "not a date" not in _date_parser._cache